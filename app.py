@@ -54,10 +54,12 @@ def get_conversation_chain(vectorstore):
 
 
 def handle_userinput(user_question):
-    response = st.session_state.conversation({'question': user_question})
-    st.session_state.chat_history = response['chat_history']
+    state = st.session_state
+    response = state.conversation({'question': user_question})
+    chat_history = response['chat_history']
+    state.chat_history = chat_history
 
-    for i, message in enumerate(st.session_state.chat_history):
+    for i, message in enumerate(chat_history):
         if i % 2 == 0:
             st.write(user_template.replace(
                 "{{MSG}}", message.content), unsafe_allow_html=True)
@@ -127,11 +129,14 @@ def main():
             st.success("Summary generated based on selected options.")
             user_question = st.text_input("💬 Ask a question about your summary:")
             if user_question:
-                if "conversation" in st.session_state:
-                    response = st.session_state.conversation({'question': user_question})
-                    st.session_state.chat_history = response['chat_history']
+                state = st.session_state
+                conversation = state.get("conversation")
+                if conversation is not None:
+                    response = conversation({'question': user_question})
+                    chat_history = response['chat_history']
+                    state.chat_history = chat_history
                     st.write("### 📜 Chat History")
-                    for msg in st.session_state.chat_history:
+                    for msg in chat_history:
                         st.write(f"**{msg['role'].capitalize()}**: {msg['content']}")
                 else:
                     st.warning("Conversation object not initialized.")
@@ -4,7 +4,7 @@ Application configuration and environment settings.
 Handles all environment variables and configuration parameters.
 """
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 import os
 from functools import lru_cache
@@ -24,12 +24,21 @@ class Settings(BaseSettings):
     # MongoDB Settings
     mongodb_url: str = "mongodb://localhost:27017"
     mongodb_name: str = "research-summary"
+    mongodb_max_pool_size: int = 50
+    mongodb_min_pool_size: int = 10
+    mongodb_max_idle_time_ms: int = 60000
+    mongodb_wait_queue_timeout_ms: int = 2500
+    mongodb_server_selection_timeout_ms: int = 3000
+    # Wire compression, in order of preference; the server picks the first it supports
+    mongodb_compressors: str = "zstd,snappy,zlib"
+    mongodb_zlib_compression_level: int = 3
     
     # Authentication Settings
     secret_key: str = "your-secret-key-here-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+    bcrypt_rounds: int = 12
     
     # OpenAI Settings
     openai_api_key: str = "" #get from .env
@@ -41,6 +50,11 @@ class Settings(BaseSettings):
     max_upload_size: int = 200 * 1024 * 1024  # 200MB
     allowed_extensions: set = {".pdf", ".docx", ".txt"}
     upload_folder: str = "uploads"
+    # Stored files no document refers to are removed once this old
+    blob_gc_grace_seconds: int = 3600
+    
+    # Internal nginx location that maps to upload_folder (enables X-Accel-Redirect downloads)
+    download_accel_redirect_prefix: Optional[str] = None
     
     # CORS Settings
     backend_cors_origins: list = ["http://localhost:8501"]  # Streamlit default
@@ -54,11 +68,18 @@ class Settings(BaseSettings):
     
     # Redis Settings (for caching)
     redis_url: Optional[str] = "redis://localhost:6379"
+    cache_enabled: bool = False
+    extract_cache_ttl: int = 30 * 24 * 3600  # 30 days in seconds
+    
+    # Background processing queue (Arq workers over Redis)
+    task_queue_enabled: bool = False
+    worker_max_jobs: int = os.cpu_count() or 1
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False
+    )
 
 
 @lru_cache()
@@ -0,0 +1,170 @@
+# backend/database/cache.py
+"""
+Redis cache client.
+Caching is best-effort: when it is disabled or Redis is unreachable,
+reads miss and writes are dropped.
+"""
+
+from typing import Optional, Dict, Any, Callable
+import asyncio
+import logging
+import time
+
+import orjson
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    aioredis = None
+    RedisError = Exception
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_redis():
+    """Get the shared Redis client, or None when caching is unavailable."""
+    global _client
+
+    if aioredis is None or not settings.cache_enabled or not settings.redis_url:
+        return None
+
+    if _client is None:
+        _client = aioredis.from_url(
+            settings.redis_url,
+            socket_connect_timeout=1,
+            socket_timeout=1
+        )
+
+    return _client
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Read a cached value."""
+    client = get_redis()
+    if client is None:
+        return None
+
+    try:
+        return await client.get(key)
+    except RedisError as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+
+
+async def cache_set(key: str, value: bytes, ttl: int) -> None:
+    """Write a cached value with an expiry in seconds."""
+    client = get_redis()
+    if client is None:
+        return
+
+    try:
+        await client.setex(key, ttl, value)
+    except RedisError as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+
+
+async def cache_delete(key: str) -> None:
+    """Remove a cached value."""
+    client = get_redis()
+    if client is None:
+        return
+
+    try:
+        await client.delete(key)
+    except RedisError as e:
+        logger.warning(f"Cache delete failed for {key}: {e}")
+
+
+class SessionCache:
+    """
+    Read-through cache of active sessions, keyed by token hash.
+    Entries carry their expiry, which is enforced on every hit.
+    """
+
+    prefix = "session:"
+
+    async def get(self, token_key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached session, or None on a miss or once it has expired."""
+        cached = await cache_get(f"{self.prefix}{token_key}")
+        if not cached:
+            return None
+
+        session = orjson.loads(cached)
+        if session["expires_at"] <= time.time():
+            return None
+
+        return session
+
+    async def set(self, token_key: str, user_id: str, expires_at: float) -> None:
+        """Cache a session until it expires (epoch seconds)."""
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+
+        await cache_set(
+            f"{self.prefix}{token_key}",
+            orjson.dumps({"user_id": user_id, "expires_at": expires_at}),
+            ttl
+        )
+
+    async def delete(self, token_key: str) -> None:
+        """Evict a session."""
+        await cache_delete(f"{self.prefix}{token_key}")
+
+
+session_cache = SessionCache()
+
+
+# Processes keep their own in-memory caches; evictions are broadcast here
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+async def publish_invalidation(kind: str, key: str) -> None:
+    """Tell every process to evict a cached entry (e.g. kind "user")."""
+    client = get_redis()
+    if client is None:
+        return
+    
+    try:
+        await client.publish(INVALIDATION_CHANNEL, f"{kind}:{key}")
+    except RedisError as e:
+        logger.warning(f"Cache invalidation publish failed for {kind}:{key}: {e}")
+
+
+async def listen_for_invalidations(handler: Callable[[str, str], None]) -> None:
+    """
+    Call handler(kind, key) for every broadcast eviction until cancelled.
+    Uses its own connection, as subscriptions block without a read timeout.
+    """
+    if get_redis() is None:
+        return
+    
+    client = aioredis.from_url(settings.redis_url, socket_connect_timeout=1)
+    try:
+        while True:
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            kind, _, key = message["data"].decode().partition(":")
+                            handler(kind, key)
+            except RedisError as e:
+                logger.warning(f"Cache invalidation listener failed, retrying: {e}")
+                await asyncio.sleep(1)
+    finally:
+        await client.close()
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client."""
+    global _client
+
+    if _client is not None:
+        await _client.close()
+        _client = None
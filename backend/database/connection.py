@@ -5,15 +5,21 @@ Handles database connections and provides database instances.
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import IndexModel
 from pymongo.errors import ConnectionFailure
 from typing import Optional
 import logging
+import asyncio
 from contextlib import asynccontextmanager
 
 from ..config.settings import settings
+from ..models.document import DocumentStatus
 
 logger = logging.getLogger(__name__)
 
+# Set once indexes have been ensured in this process
+_indexes_created = False
+
 
 class DatabaseManager:
     """Manages MongoDB connections and database operations."""
@@ -30,12 +36,17 @@ class DatabaseManager:
         try:
             self.client = AsyncIOMotorClient(
                 settings.mongodb_url,
-                maxPoolSize=10,
-                minPoolSize=1,
-                serverSelectionTimeoutMS=5000
+                maxPoolSize=settings.mongodb_max_pool_size,
+                minPoolSize=settings.mongodb_min_pool_size,
+                maxIdleTimeMS=settings.mongodb_max_idle_time_ms,
+                waitQueueTimeoutMS=settings.mongodb_wait_queue_timeout_ms,
+                serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms,
+                compressors=settings.mongodb_compressors,
+                zlibCompressionLevel=settings.mongodb_zlib_compression_level,
+                retryWrites=True
             )
             
-            # Verify connection
+            # Verify connection; this also starts warming minPoolSize connections
             await self.client.admin.command('ping')
             
             self.database = self.client[settings.mongodb_name]
@@ -58,26 +69,60 @@ class DatabaseManager:
             logger.info("Disconnected from MongoDB")
     
     async def _create_indexes(self) -> None:
-        """Create database indexes for better performance."""
+        """
+        Create database indexes for better performance.
+        Each collection's indexes go in one command, and collections are
+        handled concurrently; later connects in the same process skip this.
+        """
+        global _indexes_created
+        if _indexes_created:
+            return
+        
         try:
-            # User indexes
-            await self.database.users.create_index("email", unique=True)
-            await self.database.users.create_index("username", unique=True)
-            
-            # Document indexes
-            await self.database.documents.create_index("user_id")
-            await self.database.documents.create_index("upload_date")
-            await self.database.documents.create_index([("title", "text"), ("content", "text")])
-            
-            # Summary indexes
-            await self.database.summaries.create_index("document_id")
-            await self.database.summaries.create_index("user_id")
-            await self.database.summaries.create_index("created_at")
-            
-            # Session indexes
-            await self.database.sessions.create_index("user_id")
-            await self.database.sessions.create_index("expires_at", expireAfterSeconds=0)
+            await asyncio.gather(
+                # User indexes
+                self.database.users.create_indexes([
+                    IndexModel("email", unique=True),
+                    IndexModel("username", unique=True),
+                    # Only users that have an API key are indexed
+                    IndexModel(
+                        "api_key_hash",
+                        unique=True,
+                        partialFilterExpression={"api_key_hash": {"$type": "string"}}
+                    )
+                ]),
+                
+                # Document indexes
+                self.database.documents.create_indexes([
+                    IndexModel("user_id"),
+                    IndexModel("upload_date"),
+                    # Duplicate lookups only ever match processed documents
+                    IndexModel(
+                        [("content_hash", 1), ("user_id", 1)],
+                        name="content_hash_1_user_id_1_ready",
+                        partialFilterExpression={"status": DocumentStatus.READY.value}
+                    ),
+                    IndexModel("file_path"),
+                    IndexModel([("title", "text"), ("content", "text")])
+                ]),
+                
+                # Summary indexes
+                self.database.summaries.create_indexes([
+                    IndexModel("document_id"),
+                    IndexModel("user_id"),
+                    IndexModel("created_at")
+                ]),
+                
+                # Session indexes
+                self.database.sessions.create_indexes([
+                    # Session lookups: equality on token, then the expiry range
+                    IndexModel([("token", 1), ("expires_at", 1), ("user_id", 1)]),
+                    IndexModel("user_id"),
+                    IndexModel("expires_at", expireAfterSeconds=0)
+                ])
+            )
             
+            _indexes_created = True
             logger.info("Database indexes created successfully")
             
         except Exception as e:
@@ -5,8 +5,11 @@ Provides async functions for interacting with MongoDB collections.
 """
 
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import WriteConcern
+import asyncio
 import logging
 
 from .connection import db_manager
@@ -16,13 +19,28 @@ from ..models.summary import SummaryInDB, SummaryCreate, SummaryUpdate
 
 logger = logging.getLogger(__name__)
 
+UTC = timezone.utc
+
+# Query shapes for the hot document read paths, built once at import
+_UPLOAD_DATE_DESC = [("upload_date", -1)]
+_TEXT_SCORE_PROJECTION = {"score": {"$meta": "textScore"}}
+_TEXT_SCORE_SORT = [("score", {"$meta": "textScore"})]
+# Similarity scans only need the quantized embedding, not the full text
+_EMBEDDING_SCAN_PROJECTION = {"content": 0, "content_embedding": 0}
+_CONFLICT_PROJECTION = {"_id": 1, "email": 1}
+
+# Unacknowledged writes for bookkeeping fields nothing waits on
+_FIRE_AND_FORGET = WriteConcern(w=0)
+
 
 # Utility functions
 def to_object_id(id_str: str) -> ObjectId:
     """Convert string ID to MongoDB ObjectId."""
+    if isinstance(id_str, ObjectId):
+        return id_str
     try:
         return ObjectId(id_str)
-    except:
+    except (InvalidId, TypeError):
         raise ValueError(f"Invalid ID format: {id_str}")
 
 
@@ -41,17 +59,17 @@ class UserOperations:
     @staticmethod
     async def create_user(user_data: UserCreate, hashed_password: str) -> UserInDB:
         """Create a new user in the database."""
-        user_dict = user_data.dict()
+        user_dict = user_data.model_dump()
         user_dict.pop("password")
         
         user_db = UserInDB(
             **user_dict,
             hashed_password=hashed_password,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            created_at=datetime.now(UTC),
+            updated_at=datetime.now(UTC)
         )
         
-        result = await db_manager.users_collection.insert_one(user_db.dict())
+        result = await db_manager.users_collection.insert_one(user_db.model_dump())
         user_db.id = str(result.inserted_id)
         
         logger.info(f"Created user: {user_db.username}")
@@ -81,11 +99,61 @@ class UserOperations:
             return UserInDB(**serialize_doc(doc))
         return None
     
+    @staticmethod
+    async def get_user_by_email_or_username(identifier: str) -> Optional[UserInDB]:
+        """
+        Get user by email or username in a single query.
+        An email match wins if the identifier matches two different users.
+        """
+        docs = await db_manager.users_collection.find(
+            {"$or": [{"email": identifier}, {"username": identifier}]}
+        ).to_list(length=2)
+        
+        if not docs:
+            return None
+        
+        doc = next((d for d in docs if d.get("email") == identifier), docs[0])
+        return UserInDB(**serialize_doc(doc))
+    
+    @staticmethod
+    async def find_conflicting_user(email: str, username: str) -> Optional[str]:
+        """
+        Check in one query whether an email or username is taken.
+        Returns "email" or "username" for the conflicting field, else None.
+        """
+        docs = await db_manager.users_collection.find(
+            {"$or": [{"email": email}, {"username": username}]},
+            _CONFLICT_PROJECTION
+        ).to_list(length=2)
+        
+        if not docs:
+            return None
+        if any(doc.get("email") == email for doc in docs):
+            return "email"
+        return "username"
+    
+    @staticmethod
+    async def get_user_by_api_key_hash(api_key_hash: str) -> Optional[UserInDB]:
+        """Get user by the hash of their API key."""
+        doc = await db_manager.users_collection.find_one({"api_key_hash": api_key_hash})
+        if doc:
+            return UserInDB(**serialize_doc(doc))
+        return None
+    
+    @staticmethod
+    async def set_api_key_hash(user_id: str, api_key_hash: str) -> bool:
+        """Store the hash of a user's API key, replacing any previous one."""
+        result = await db_manager.users_collection.update_one(
+            {"_id": to_object_id(user_id)},
+            {"$set": {"api_key_hash": api_key_hash, "updated_at": datetime.now(UTC)}}
+        )
+        return result.modified_count > 0
+    
     @staticmethod
     async def update_user(user_id: str, user_update: UserUpdate) -> Optional[UserInDB]:
         """Update user information."""
-        update_data = user_update.dict(exclude_unset=True)
-        update_data["updated_at"] = datetime.utcnow()
+        update_data = user_update.model_dump(exclude_unset=True)
+        update_data["updated_at"] = datetime.now(UTC)
         
         result = await db_manager.users_collection.find_one_and_update(
             {"_id": to_object_id(user_id)},
@@ -99,10 +167,14 @@ class UserOperations:
     
     @staticmethod
     async def update_last_login(user_id: str) -> None:
-        """Update user's last login timestamp."""
-        await db_manager.users_collection.update_one(
+        """
+        Update user's last login timestamp.
+        The write is not acknowledged, so login does not wait on it.
+        """
+        users = db_manager.users_collection.with_options(write_concern=_FIRE_AND_FORGET)
+        await users.update_one(
             {"_id": to_object_id(user_id)},
-            {"$set": {"last_login": datetime.utcnow()}}
+            {"$set": {"last_login": datetime.now(UTC)}}
         )
     
     @staticmethod
@@ -118,7 +190,7 @@ class UserOperations:
         """Soft delete a user (marks as inactive)."""
         result = await db_manager.users_collection.update_one(
             {"_id": to_object_id(user_id)},
-            {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
+            {"$set": {"is_active": False, "updated_at": datetime.now(UTC)}}
         )
         return result.modified_count > 0
 
@@ -130,9 +202,9 @@ class DocumentOperations:
     @staticmethod
     async def create_document(doc_data: DocumentCreate) -> DocumentInDB:
         """Create a new document in the database."""
-        doc_db = DocumentInDB(**doc_data.dict())
+        doc_db = DocumentInDB(**doc_data.model_dump())
         
-        result = await db_manager.documents_collection.insert_one(doc_db.dict())
+        result = await db_manager.documents_collection.insert_one(doc_db.model_dump())
         doc_db.id = str(result.inserted_id)
         
         # Update user stats
@@ -144,13 +216,30 @@ class DocumentOperations:
     @staticmethod
     async def get_document(document_id: str) -> Optional[DocumentInDB]:
         """Get document by ID."""
-        doc = await db_manager.documents_collection.find_one({"_id": to_object_id(document_id)})
+        # Fetch and update last accessed in a single round trip
+        doc = await db_manager.documents_collection.find_one_and_update(
+            {"_id": to_object_id(document_id)},
+            {"$set": {"last_accessed": datetime.now(UTC)}}
+        )
+        if doc:
+            return DocumentInDB(**serialize_doc(doc))
+        return None
+    
+    @staticmethod
+    async def get_document_by_hash(content_hash: str, user_id: Optional[str] = None) -> Optional[DocumentInDB]:
+        """
+        Get a processed document with the given content hash.
+        Restricted to one user's documents when user_id is given.
+        """
+        query = {
+            "content_hash": content_hash,
+            "status": DocumentStatus.READY.value
+        }
+        if user_id:
+            query["user_id"] = user_id
+        
+        doc = await db_manager.documents_collection.find_one(query)
         if doc:
-            # Update last accessed
-            await db_manager.documents_collection.update_one(
-                {"_id": to_object_id(document_id)},
-                {"$set": {"last_accessed": datetime.utcnow()}}
-            )
             return DocumentInDB(**serialize_doc(doc))
         return None
     
@@ -166,31 +255,57 @@ class DocumentOperations:
         if status:
             query["status"] = status.value
         
-        # Count total documents
-        total = await db_manager.documents_collection.count_documents(query)
-        
-        # Get paginated results
+        # Count and fetch the page concurrently
         skip = (page - 1) * page_size
-        cursor = db_manager.documents_collection.find(query).skip(skip).limit(page_size).sort("upload_date", -1)
+        cursor = db_manager.documents_collection.find(query).sort(_UPLOAD_DATE_DESC).skip(skip).limit(page_size)
         
-        documents = []
-        async for doc in cursor:
-            documents.append(DocumentInDB(**serialize_doc(doc)))
+        total, docs = await asyncio.gather(
+            db_manager.documents_collection.count_documents(query),
+            cursor.to_list(length=page_size)
+        )
         
         return {
-            "documents": documents,
+            "documents": [DocumentInDB(**serialize_doc(doc)) for doc in docs],
             "total": total,
             "page": page,
             "page_size": page_size
         }
     
     @staticmethod
-    async def update_document(document_id: str, update_data: DocumentUpdate) -> Optional[DocumentInDB]:
-        """Update document information."""
-        update_dict = update_data.dict(exclude_unset=True)
+    async def get_embedded_documents(user_id: str) -> List[DocumentInDB]:
+        """Get a user's processed documents that have an embedding (without content)."""
+        cursor = db_manager.documents_collection.find(
+            {
+                "user_id": user_id,
+                "status": DocumentStatus.READY.value,
+                "embedding_q8": {"$ne": None}
+            },
+            _EMBEDDING_SCAN_PROJECTION
+        )
+        
+        documents = []
+        async for doc in cursor:
+            documents.append(DocumentInDB(**serialize_doc(doc)))
+        
+        return documents
+    
+    @staticmethod
+    async def update_document(
+        document_id: str,
+        update_data: DocumentUpdate,
+        extra_fields: Optional[Dict[str, Any]] = None
+    ) -> Optional[DocumentInDB]:
+        """
+        Update document information.
+        extra_fields sets internal fields that are not user-editable
+        (embeddings, processing errors).
+        """
+        update_dict = update_data.model_dump(exclude_unset=True)
+        if extra_fields:
+            update_dict.update(extra_fields)
         
         if "status" in update_dict and update_dict["status"] == DocumentStatus.READY:
-            update_dict["processed_date"] = datetime.utcnow()
+            update_dict["processed_date"] = datetime.now(UTC)
         
         result = await db_manager.documents_collection.find_one_and_update(
             {"_id": to_object_id(document_id)},
@@ -202,6 +317,36 @@ class DocumentOperations:
             return DocumentInDB(**serialize_doc(result))
         return None
     
+    @staticmethod
+    async def update_if_owner(
+        document_id: str,
+        user_id: str,
+        is_admin: bool,
+        update_data: DocumentUpdate
+    ) -> Optional[DocumentInDB]:
+        """
+        Update a document only if it belongs to the user (or the user is an admin).
+        Returns None when the document does not exist or access is denied.
+        """
+        query = {"_id": to_object_id(document_id)}
+        if not is_admin:
+            query["user_id"] = user_id
+        
+        update_dict = update_data.model_dump(exclude_unset=True)
+        
+        if "status" in update_dict and update_dict["status"] == DocumentStatus.READY:
+            update_dict["processed_date"] = datetime.now(UTC)
+        
+        result = await db_manager.documents_collection.find_one_and_update(
+            query,
+            {"$set": update_dict},
+            return_document=True
+        )
+        
+        if result:
+            return DocumentInDB(**serialize_doc(result))
+        return None
+    
     @staticmethod
     async def search_documents(
         user_id: str,
@@ -216,8 +361,8 @@ class DocumentOperations:
         
         cursor = db_manager.documents_collection.find(
             search_query,
-            {"score": {"$meta": "textScore"}}
-        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+            _TEXT_SCORE_PROJECTION
+        ).sort(_TEXT_SCORE_SORT).limit(limit)
         
         documents = []
         async for doc in cursor:
@@ -233,6 +378,36 @@ class DocumentOperations:
             {"$set": {"status": DocumentStatus.DELETED.value}}
         )
         return result.modified_count > 0
+    
+    @staticmethod
+    async def delete_if_owner(document_id: str, user_id: str, is_admin: bool) -> Optional[DocumentInDB]:
+        """
+        Soft delete a document only if it belongs to the user (or the user is an admin).
+        Returns the deleted document, or None when it does not exist or access is denied.
+        """
+        query = {
+            "_id": to_object_id(document_id),
+            "status": {"$ne": DocumentStatus.DELETED.value}
+        }
+        if not is_admin:
+            query["user_id"] = user_id
+        
+        result = await db_manager.documents_collection.find_one_and_update(
+            query,
+            {"$set": {"status": DocumentStatus.DELETED.value}}
+        )
+        
+        if result:
+            return DocumentInDB(**serialize_doc(result))
+        return None
+    
+    @staticmethod
+    async def count_file_references(file_path: str) -> int:
+        """Count documents (not deleted) that point to a stored file."""
+        return await db_manager.documents_collection.count_documents({
+            "file_path": file_path,
+            "status": {"$ne": DocumentStatus.DELETED.value}
+        })
 
 
 # Summary operations
@@ -243,12 +418,12 @@ class SummaryOperations:
     async def create_summary(summary_data: SummaryCreate, content: Dict[str, Any], generation_metadata: Dict[str, Any]) -> SummaryInDB:
         """Create a new summary in the database."""
         summary_db = SummaryInDB(
-            **summary_data.dict(),
+            **summary_data.model_dump(),
             content=content,
             **generation_metadata
         )
         
-        result = await db_manager.summaries_collection.insert_one(summary_db.dict())
+        result = await db_manager.summaries_collection.insert_one(summary_db.model_dump())
         summary_db.id = str(result.inserted_id)
         
         # Update user stats
@@ -260,14 +435,15 @@ class SummaryOperations:
     @staticmethod
     async def get_summary(summary_id: str) -> Optional[SummaryInDB]:
         """Get summary by ID."""
-        doc = await db_manager.summaries_collection.find_one({"_id": to_object_id(summary_id)})
+        summary_oid = to_object_id(summary_id)
+        doc = await db_manager.summaries_collection.find_one({"_id": summary_oid})
         if doc:
             # Update view count and last viewed
             await db_manager.summaries_collection.update_one(
-                {"_id": to_object_id(summary_id)},
+                {"_id": summary_oid},
                 {
                     "$inc": {"view_count": 1},
-                    "$set": {"last_viewed": datetime.utcnow()}
+                    "$set": {"last_viewed": datetime.now(UTC)}
                 }
             )
             return SummaryInDB(**serialize_doc(doc))
@@ -316,7 +492,7 @@ class SummaryOperations:
     @staticmethod
     async def update_summary(summary_id: str, update_data: SummaryUpdate) -> Optional[SummaryInDB]:
         """Update summary information."""
-        update_dict = update_data.dict(exclude_unset=True)
+        update_dict = update_data.model_dump(exclude_unset=True)
         
         result = await db_manager.summaries_collection.find_one_and_update(
             {"_id": to_object_id(summary_id)},
@@ -367,40 +543,52 @@ class SessionOperations:
         session_data = {
             "user_id": user_id,
             "token": token,
-            "created_at": datetime.utcnow(),
-            "expires_at": datetime.utcnow() + expires_delta,
-            "is_active": True
+            "created_at": datetime.now(UTC),
+            "expires_at": datetime.now(UTC) + expires_delta
         }
         
         result = await db_manager.sessions_collection.insert_one(session_data)
         return str(result.inserted_id)
     
     @staticmethod
-    async def get_session(token: str) -> Optional[Dict[str, Any]]:
-        """Get active session by token."""
-        session = await db_manager.sessions_collection.find_one({
-            "token": token,
-            "is_active": True,
-            "expires_at": {"$gt": datetime.utcnow()}
-        })
+    async def get_session_user(token: str) -> Optional[UserInDB]:
+        """
+        Get the user of an active session by token.
+        The session and user are joined server-side in one round trip.
+        """
+        pipeline = [
+            {"$match": {
+                "token": token,
+                "expires_at": {"$gt": datetime.now(UTC)}
+            }},
+            {"$limit": 1},
+            # Sessions store user_id as a string; users are keyed by ObjectId
+            {"$lookup": {
+                "from": "users",
+                "let": {"user_oid": {"$convert": {"input": "$user_id", "to": "objectId", "onError": None}}},
+                "pipeline": [{"$match": {"$expr": {"$eq": ["$_id", "$$user_oid"]}}}],
+                "as": "user"
+            }},
+            {"$unwind": "$user"},
+            {"$replaceRoot": {"newRoot": "$user"}}
+        ]
+        
+        docs = await db_manager.sessions_collection.aggregate(pipeline).to_list(length=1)
         
-        if session:
-            return serialize_doc(session)
+        if docs:
+            return UserInDB(**serialize_doc(docs[0]))
         return None
     
     @staticmethod
     async def invalidate_session(token: str) -> bool:
-        """Invalidate a session."""
-        result = await db_manager.sessions_collection.update_one(
-            {"token": token},
-            {"$set": {"is_active": False}}
-        )
-        return result.modified_count > 0
+        """Invalidate a session by deleting it."""
+        result = await db_manager.sessions_collection.delete_one({"token": token})
+        return result.deleted_count > 0
     
     @staticmethod
     async def cleanup_expired_sessions() -> int:
         """Remove expired sessions."""
         result = await db_manager.sessions_collection.delete_many({
-            "expires_at": {"$lt": datetime.utcnow()}
+            "expires_at": {"$lt": datetime.now(UTC)}
         })
         return result.deleted_count
\ No newline at end of file
@@ -8,18 +8,24 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import time
+import orjson
 from typing import Dict, Any
 import uvicorn
 
 from .config.settings import settings
 from .database.connection import db_manager
+from .utils.json import dumps
+from .database.cache import close_redis, listen_for_invalidations
 from .routers import auth, upload, summarize
+from .services.file_service import get_file_service
+from .services.user_service import evict_cached
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +35,20 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Seconds between in-process blob collection runs (without Arq workers)
+BLOB_GC_INTERVAL = 3600
+
+
+async def collect_orphaned_blobs() -> None:
+    """Periodically remove stored files that no document refers to."""
+    while True:
+        await asyncio.sleep(BLOB_GC_INTERVAL)
+        try:
+            await get_file_service().remove_orphaned_blobs(settings.blob_gc_grace_seconds)
+        except Exception as e:
+            logger.error(f"Blob collection failed: {e}")
+
+
 # Lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -47,6 +67,23 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to connect to database: {e}")
         raise
     
+    # Connect to the document processing queue
+    app.state.arq_pool = None
+    if settings.task_queue_enabled:
+        from arq import create_pool
+        from arq.connections import RedisSettings
+        
+        app.state.arq_pool = await create_pool(RedisSettings.from_dsn(settings.redis_url))
+        logger.info("Task queue connected successfully")
+    
+    # Apply cache evictions broadcast by other API processes
+    invalidation_listener = asyncio.create_task(listen_for_invalidations(evict_cached))
+    
+    # Arq workers collect orphaned blobs on a cron; otherwise do it here
+    blob_gc = None
+    if app.state.arq_pool is None:
+        blob_gc = asyncio.create_task(collect_orphaned_blobs())
+    
     # Initialize other services if needed
     logger.info("API startup complete")
     
@@ -55,12 +92,30 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down API...")
     
+    invalidation_listener.cancel()
+    if blob_gc is not None:
+        blob_gc.cancel()
+    
+    # Disconnect from the task queue
+    if app.state.arq_pool is not None:
+        await app.state.arq_pool.close()
+    
+    # Close the cache client
+    await close_redis()
+    
     # Disconnect from database
     await db_manager.disconnect()
     
     logger.info("API shutdown complete")
 
 
+class AppJSONResponse(ORJSONResponse):
+    """JSON response rendered with the shared orjson serializer."""
+    
+    def render(self, content) -> bytes:
+        return dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
@@ -85,6 +140,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=AppJSONResponse,
     lifespan=lifespan
 )
 
@@ -113,9 +169,9 @@ app.add_middleware(GZipMiddleware, minimum_size=1000)
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """Add processing time to response headers."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     response = await call_next(request)
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
@@ -145,7 +201,7 @@ async def rate_limit_middleware(request: Request, call_next):
             }
         elif request_data["count"] >= settings.rate_limit_requests:
             # Rate limit exceeded
-            return JSONResponse(
+            return AppJSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={"detail": "Rate limit exceeded. Please try again later."}
             )
@@ -167,7 +223,7 @@ async def rate_limit_middleware(request: Request, call_next):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors with detailed messages."""
-    return JSONResponse(
+    return AppJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "Validation error",
@@ -180,7 +236,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """Handle HTTP exceptions."""
-    return JSONResponse(
+    return AppJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
@@ -196,7 +252,7 @@ async def general_exception_handler(request: Request, exc: Exception):
     
     # Don't expose internal errors in production
     if settings.debug:
-        return JSONResponse(
+        return AppJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "detail": "Internal server error",
@@ -204,7 +260,7 @@ async def general_exception_handler(request: Request, exc: Exception):
             }
         )
     else:
-        return JSONResponse(
+        return AppJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Internal server error"}
         )
@@ -264,7 +320,7 @@ async def health_check():
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        return AppJSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={
                 "status": "unhealthy",
@@ -4,12 +4,14 @@ Document data models and schemas.
 Defines document-related data structures for research papers.
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 import uuid
 
+UTC = timezone.utc
+
 
 class DocumentType(str, Enum):
     """Document type enumeration."""
@@ -34,12 +36,12 @@ class DocumentSection(BaseModel):
     page_numbers: List[int] = []
     word_count: int = 0
     
-    @validator('word_count', always=True)
-    def calculate_word_count(cls, v, values):
+    @model_validator(mode='after')
+    def calculate_word_count(self):
         """Calculate word count if not provided."""
-        if v == 0 and 'content' in values:
-            return len(values['content'].split())
-        return v
+        if self.word_count == 0:
+            self.word_count = len(self.content.split())
+        return self
 
 
 class DocumentMetadata(BaseModel):
@@ -75,7 +77,8 @@ class DocumentBase(BaseModel):
     file_size: int  # in bytes
     content_hash: str  # SHA-256 hash of file content
     
-    @validator('file_size')
+    @field_validator('file_size')
+    @classmethod
     def validate_file_size(cls, v):
         """Ensure file size is within limits."""
         max_size = 10 * 1024 * 1024  # 10MB
@@ -111,16 +114,18 @@ class DocumentInDB(DocumentBase):
     
     # Content
     content: Optional[str] = None  # Extracted text content
-    content_embedding: Optional[List[float]] = None  # Vector embedding
+    content_embedding: Optional[List[float]] = None  # Legacy FP32 vector embedding
+    embedding_q8: Optional[bytes] = None  # int8-quantized vector embedding
+    embedding_scale: Optional[float] = None  # Scale to dequantize embedding_q8
     
     # Metadata
     metadata: DocumentMetadata = Field(default_factory=DocumentMetadata)
     
     # Status and timestamps
     status: DocumentStatus = DocumentStatus.UPLOADING
-    upload_date: datetime = Field(default_factory=datetime.utcnow)
+    upload_date: datetime = Field(default_factory=lambda: datetime.now(UTC))
     processed_date: Optional[datetime] = None
-    last_accessed: datetime = Field(default_factory=datetime.utcnow)
+    last_accessed: datetime = Field(default_factory=lambda: datetime.now(UTC))
     
     # User annotations
     tags: List[str] = []
@@ -134,11 +139,7 @@ class DocumentInDB(DocumentBase):
     # Related documents
     similar_documents: List[Dict[str, Any]] = []  # List of {document_id, similarity_score}
     
-    class Config:
-        orm_mode = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(from_attributes=True)
 
 
 class DocumentResponse(BaseModel):
@@ -150,17 +151,13 @@ class DocumentResponse(BaseModel):
     file_size: int
     status: DocumentStatus
     upload_date: datetime
-    processed_date: Optional[datetime]
+    processed_date: Optional[datetime] = None
     metadata: DocumentMetadata
     tags: List[str]
-    notes: Optional[str]
+    notes: Optional[str] = None
     is_favorite: bool
     
-    class Config:
-        orm_mode = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(from_attributes=True)
 
 
 class DocumentListResponse(BaseModel):
@@ -170,8 +167,8 @@ class DocumentListResponse(BaseModel):
     page: int
     page_size: int
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "documents": [
                     {
@@ -187,6 +184,7 @@ class DocumentListResponse(BaseModel):
                 "page_size": 10
             }
         }
+    )
 
 
 class DocumentSearchQuery(BaseModel):
@@ -197,13 +195,15 @@ class DocumentSearchQuery(BaseModel):
     page: int = 1
     page_size: int = 10
     
-    @validator('page')
+    @field_validator('page')
+    @classmethod
     def validate_page(cls, v):
         if v < 1:
             raise ValueError('Page must be >= 1')
         return v
     
-    @validator('page_size')
+    @field_validator('page_size')
+    @classmethod
     def validate_page_size(cls, v):
         if v < 1 or v > 100:
             raise ValueError('Page size must be between 1 and 100')
@@ -216,13 +216,15 @@ class SimilarDocumentRequest(BaseModel):
     top_k: int = 5
     min_similarity: float = 0.7
     
-    @validator('top_k')
+    @field_validator('top_k')
+    @classmethod
     def validate_top_k(cls, v):
         if v < 1 or v > 20:
             raise ValueError('top_k must be between 1 and 20')
         return v
     
-    @validator('min_similarity')
+    @field_validator('min_similarity')
+    @classmethod
     def validate_similarity(cls, v):
         if v < 0 or v > 1:
             raise ValueError('min_similarity must be between 0 and 1')
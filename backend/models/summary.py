@@ -4,12 +4,14 @@ Summary data models and schemas.
 Defines summary-related data structures for AI-generated summaries.
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator, model_validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 import uuid
 
+UTC = timezone.utc
+
 
 class SummaryType(str, Enum):
     """Summary type enumeration."""
@@ -54,10 +56,11 @@ class SummaryParameters(BaseModel):
     focus_topics: List[str] = []
     exclude_topics: List[str] = []
     
-    @validator('target_word_count')
-    def validate_word_count(cls, v, values):
+    @field_validator('target_word_count')
+    @classmethod
+    def validate_word_count(cls, v, info: ValidationInfo):
         """Validate custom word count."""
-        if values.get('summary_length') == SummaryLength.CUSTOM and v is None:
+        if info.data.get('summary_length') == SummaryLength.CUSTOM and v is None:
             raise ValueError('target_word_count required when summary_length is CUSTOM')
         if v is not None and (v < 50 or v > 1000):
             raise ValueError('target_word_count must be between 50 and 1000')
@@ -75,7 +78,8 @@ class SummaryCreate(SummaryBase):
     """Schema for creating a new summary."""
     custom_prompt: Optional[str] = None
     
-    @validator('custom_prompt')
+    @field_validator('custom_prompt')
+    @classmethod
     def validate_prompt(cls, v):
         """Validate custom prompt length."""
         if v and len(v) > 500:
@@ -105,12 +109,12 @@ class SummaryContent(BaseModel):
     word_count: int = 0
     sentence_count: int = 0
     
-    @validator('word_count', always=True)
-    def calculate_word_count(cls, v, values):
+    @model_validator(mode='after')
+    def calculate_word_count(self):
         """Calculate word count from main summary."""
-        if v == 0 and 'main_summary' in values:
-            return len(values['main_summary'].split())
-        return v
+        if self.word_count == 0:
+            self.word_count = len(self.main_summary.split())
+        return self
 
 
 class SummaryInDB(SummaryBase):
@@ -121,7 +125,7 @@ class SummaryInDB(SummaryBase):
     content: SummaryContent
     
     # Generation metadata
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     generation_time_seconds: float
     model_used: str
     prompt_tokens: int
@@ -143,11 +147,10 @@ class SummaryInDB(SummaryBase):
     exported_count: int = 0
     last_exported: Optional[datetime] = None
     
-    class Config:
-        orm_mode = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(
+        from_attributes=True,
+        protected_namespaces=()  # allow the model_used field
+    )
 
 
 class SummaryResponse(BaseModel):
@@ -158,15 +161,14 @@ class SummaryResponse(BaseModel):
     parameters: SummaryParameters
     created_at: datetime
     model_used: str
-    rating: Optional[int]
+    rating: Optional[int] = None
     is_favorite: bool
     view_count: int
     
-    class Config:
-        orm_mode = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(
+        from_attributes=True,
+        protected_namespaces=()  # allow the model_used field
+    )
 
 
 class SummaryListResponse(BaseModel):
@@ -197,7 +199,8 @@ class BatchSummaryRequest(BaseModel):
     document_ids: List[str]
     parameters: SummaryParameters
     
-    @validator('document_ids')
+    @field_validator('document_ids')
+    @classmethod
     def validate_document_ids(cls, v):
         """Limit batch size."""
         if len(v) > 10:
@@ -223,7 +226,8 @@ class SummaryExportRequest(BaseModel):
     include_metadata: bool = True
     include_document_info: bool = True
     
-    @validator('format')
+    @field_validator('format')
+    @classmethod
     def validate_format(cls, v):
         allowed_formats = ['pdf', 'docx', 'markdown', 'json']
         if v not in allowed_formats:
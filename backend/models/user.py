@@ -4,12 +4,14 @@ User data models and schemas.
 Defines user-related data structures for the application.
 """
 
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 import uuid
 
+UTC = timezone.utc
+
 
 class UserRole(str, Enum):
     """User role enumeration."""
@@ -26,8 +28,8 @@ class UserPreferences(BaseModel):
     preferred_sections: List[str] = ["abstract", "results", "conclusions"]
     language: str = "en"
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "summary_length": "medium",
                 "summary_style": "abstractive",
@@ -36,6 +38,7 @@ class UserPreferences(BaseModel):
                 "language": "en"
             }
         }
+    )
 
 
 class UserBase(BaseModel):
@@ -52,7 +55,8 @@ class UserCreate(UserBase):
     """Schema for creating a new user."""
     password: str = Field(..., min_length=8)
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
         """Ensure password meets security requirements."""
         if not any(char.isdigit() for char in v):
@@ -79,11 +83,14 @@ class UserInDB(UserBase):
     """User schema as stored in database."""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     hashed_password: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     last_login: Optional[datetime] = None
     email_verified: bool = False
     
+    # SHA-256 of the user's API key; the key itself is never stored
+    api_key_hash: Optional[str] = None
+    
     # Usage statistics
     documents_uploaded: int = 0
     summaries_generated: int = 0
@@ -94,11 +101,7 @@ class UserInDB(UserBase):
     subscription_tier: str = "free"
     subscription_expires: Optional[datetime] = None
     
-    class Config:
-        orm_mode = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserResponse(UserBase):
@@ -106,17 +109,13 @@ class UserResponse(UserBase):
     id: str
     created_at: datetime
     updated_at: datetime
-    last_login: Optional[datetime]
+    last_login: Optional[datetime] = None
     email_verified: bool
     documents_uploaded: int
     summaries_generated: int
     subscription_tier: str
     
-    class Config:
-        orm_mode = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserLogin(BaseModel):
@@ -139,7 +138,7 @@ class TokenData(BaseModel):
     username: str
     email: str
     role: UserRole
-    exp: datetime
+    exp: int  # Expiry as epoch seconds
 
 
 class PasswordReset(BaseModel):
@@ -164,8 +163,8 @@ class UserStats(BaseModel):
     favorite_topics: List[str]
     recent_activity: List[Dict[str, Any]]
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "user_id": "123e4567-e89b-12d3-a456-426614174000",
                 "total_documents": 42,
@@ -182,4 +181,5 @@ class UserStats(BaseModel):
                     }
                 ]
             }
-        }
\ No newline at end of file
+        }
+    )
\ No newline at end of file
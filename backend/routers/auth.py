@@ -13,7 +13,7 @@ from ..models.user import (
     UserCreate, UserResponse, UserLogin, Token,
     PasswordReset, PasswordResetConfirm
 )
-from ..services.user_service import user_service
+from ..services.user_service import get_user_service
 # from ..services.email_service import email_service  
 logger = logging.getLogger(__name__)
 
@@ -27,7 +27,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Dependency to get current authenticated user."""
-    user = await user_service.get_current_user(token)
+    user = await get_user_service().get_current_user(token)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,7 +48,7 @@ async def register(user_data: UserCreate):
     - **full_name**: Optional full name
     """
     try:
-        user = await user_service.register_user(user_data)
+        user = await get_user_service().register_user(user_data)
         
         return UserResponse(
             id=user.id,
@@ -87,7 +87,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     
     Returns access and refresh tokens.
     """
-    user = await user_service.authenticate_user(
+    user = await get_user_service().authenticate_user(
         form_data.username,  # Can be username or email
         form_data.password
     )
@@ -106,7 +106,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         )
     
     # Create tokens
-    tokens = await user_service.create_tokens(user)
+    tokens = await get_user_service().create_tokens(user)
     
     logger.info(f"User logged in: {user.username}")
     
@@ -118,7 +118,7 @@ async def refresh_token(refresh_token: str):
     """
     Refresh access token using refresh token.
     """
-    tokens = await user_service.refresh_access_token(refresh_token)
+    tokens = await get_user_service().refresh_access_token(refresh_token)
     
     if not tokens:
         raise HTTPException(
@@ -137,7 +137,7 @@ async def logout(
     """
     Logout current user by invalidating their session.
     """
-    success = await user_service.logout_user(token)
+    success = await get_user_service().logout_user(token)
     
     if not success:
         raise HTTPException(
@@ -180,7 +180,7 @@ async def change_password(
     """
     Change password for current user.
     """
-    success = await user_service.change_password(
+    success = await get_user_service().change_password(
         user.id,
         old_password,
         new_password
@@ -200,11 +200,11 @@ async def forgot_password(data: PasswordReset):
     """
     Request password reset email.
     """
-    user = await user_service.get_user_by_email(data.email)
+    user = await get_user_service().get_user_by_email(data.email)
     
     # Don't reveal if email exists or not for security
     if user:
-        reset_token = user_service.generate_password_reset_token(data.email)
+        reset_token = get_user_service().generate_password_reset_token(data.email)
         
         # Send reset email
         # await email_service.send_password_reset_email(
@@ -220,7 +220,7 @@ async def reset_password(data: PasswordResetConfirm):
     """
     Reset password using reset token.
     """
-    success = await user_service.reset_password(
+    success = await get_user_service().reset_password(
         data.token,
         data.new_password
     )
@@ -256,7 +256,7 @@ async def resend_verification_email(user=Depends(get_current_user)):
         )
     
     # Send verification email
-    # verification_token = user_service.generate_email_verification_token(user.email)
+    # verification_token = get_user_service().generate_email_verification_token(user.email)
     # await email_service.send_verification_email(user.email, verification_token)
     
     logger.info(f"Verification email resent to: {user.email}")
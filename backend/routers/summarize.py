@@ -7,10 +7,11 @@ Handles AI-powered summarization and related features.
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
-import json
+import orjson
 import io
-from datetime import datetime
+from datetime import datetime, timezone
 
 from ..models.summary import (
     SummaryCreate, SummaryResponse, SummaryUpdate,
@@ -23,6 +24,7 @@ from ..models.document import DocumentStatus
 from ..models.user import UserInDB
 from ..services.ai_service import ai_service
 from ..database.operations import DocumentOperations, SummaryOperations, UserOperations
+from ..utils.json import dumps
 from .auth import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -76,7 +78,7 @@ async def create_summary(
         # Save summary to database
         summary_db = await SummaryOperations.create_summary(
             summary_request,
-            summary_content.dict(),
+            summary_content.model_dump(),
             generation_metadata
         )
         
@@ -115,10 +117,13 @@ async def create_batch_summaries(
     """
     summaries = []
     
-    for document_id in batch_request.document_ids:
+    # Fetch all requested documents concurrently
+    documents = await asyncio.gather(
+        *(DocumentOperations.get_document(document_id) for document_id in batch_request.document_ids)
+    )
+    
+    for document_id, document in zip(batch_request.document_ids, documents):
         # Verify document access
-        document = await DocumentOperations.get_document(document_id)
-        
         if not document or document.user_id != user.id:
             continue
         
@@ -160,7 +165,7 @@ async def generate_summary_background(summary_request: SummaryCreate, document):
         
         await SummaryOperations.create_summary(
             summary_request,
-            summary_content.dict(),
+            summary_content.model_dump(),
             generation_metadata
         )
         
@@ -376,7 +381,7 @@ async def regenerate_summary(
         # Save new summary
         new_summary = await SummaryOperations.create_summary(
             summary_create,
-            summary_content.dict(),
+            summary_content.model_dump(),
             generation_metadata
         )
         
@@ -424,15 +429,18 @@ async def compare_summaries(
         )
     
     # Get summaries
+    fetched = await asyncio.gather(
+        *(SummaryOperations.get_summary(summary_id) for summary_id in summary_ids)
+    )
+    
     summaries = []
-    for summary_id in summary_ids:
-        summary = await SummaryOperations.get_summary(summary_id)
+    for summary in fetched:
         if summary and summary.document_id == document_id and summary.user_id == user.id:
             summaries.append({
                 "id": summary.id,
-                "parameters": summary.parameters.dict(),
+                "parameters": summary.parameters.model_dump(),
                 "content": summary.content.main_summary,
-                "created_at": summary.created_at.isoformat(),
+                "created_at": summary.created_at,
                 "rating": summary.rating
             })
     
@@ -466,11 +474,10 @@ async def export_summaries(
     Supported formats: PDF, DOCX, Markdown, JSON
     """
     # Verify access to summaries
-    summaries = []
-    for summary_id in export_request.summary_ids:
-        summary = await SummaryOperations.get_summary(summary_id)
-        if summary and summary.user_id == user.id:
-            summaries.append(summary)
+    fetched = await asyncio.gather(
+        *(SummaryOperations.get_summary(summary_id) for summary_id in export_request.summary_ids)
+    )
+    summaries = [summary for summary in fetched if summary and summary.user_id == user.id]
     
     if not summaries:
         raise HTTPException(
@@ -486,9 +493,9 @@ async def export_summaries(
             data = {
                 "summary_id": summary.id,
                 "document_id": summary.document_id,
-                "content": summary.content.dict(),
-                "parameters": summary.parameters.dict(),
-                "created_at": summary.created_at.isoformat(),
+                "content": summary.content.model_dump(),
+                "parameters": summary.parameters.model_dump(),
+                "created_at": summary.created_at,
                 "model_used": summary.model_used
             }
             
@@ -503,13 +510,13 @@ async def export_summaries(
             
             export_data.append(data)
         
-        json_content = json.dumps(export_data, indent=2)
+        json_content = dumps(export_data, option=orjson.OPT_INDENT_2)
         
         return StreamingResponse(
-            io.StringIO(json_content),
+            io.BytesIO(json_content),
             media_type="application/json",
             headers={
-                "Content-Disposition": f"attachment; filename=summaries_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
+                "Content-Disposition": f"attachment; filename=summaries_export_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.json"
             }
         )
     
@@ -545,7 +552,7 @@ async def export_summaries(
             io.StringIO(markdown_content),
             media_type="text/markdown",
             headers={
-                "Content-Disposition": f"attachment; filename=summaries_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.md"
+                "Content-Disposition": f"attachment; filename=summaries_export_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.md"
             }
         )
     
@@ -594,7 +601,7 @@ async def answer_question(
             "document_id": document_id,
             "question": question,
             "answer": answer,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
         
     except Exception as e:
@@ -4,20 +4,26 @@ File upload router.
 Handles document upload, processing, and management.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, BackgroundTasks, Response, Request
 from typing import List, Optional
+import asyncio
 import logging
+import re
 import aiofiles
 from pathlib import Path
+from urllib.parse import quote
 
 from ..models.document import (
     DocumentResponse, DocumentListResponse, DocumentCreate,
     DocumentUpdate, DocumentStatus, DocumentSearchQuery,
     SimilarDocumentRequest, DocumentAnalytics
 )
+from ..config.settings import settings
 from ..models.user import UserInDB
-from ..services.file_service import file_service
-from ..services.ai_service import ai_service
+from ..services.file_service import get_file_service
+from ..services.ai_service import (
+    ai_service, quantize_embedding, dequantize_embedding, cosine_similarities
+)
 from ..database.operations import DocumentOperations, UserOperations
 from .auth import get_current_user
 
@@ -28,15 +34,50 @@ router = APIRouter(
     tags=["documents"]
 )
 
+# Matches a single whitespace-delimited word
+_WORD_RE = re.compile(r'\S+')
+
 
-async def process_document_background(document_id: str, file_path: str, doc_type: str):
+async def process_document_background(
+    document_id: str,
+    file_path: str,
+    doc_type: str,
+    content_hash: Optional[str] = None,
+    user_id: Optional[str] = None
+):
     """Background task to process uploaded document."""
     try:
+        # Reuse the results of an identical file this user already processed.
+        # Other users' documents are never copied: owners can edit their
+        # content and metadata. Identical files across users still share
+        # the extraction cache.
+        processed = (
+            await DocumentOperations.get_document_by_hash(content_hash, user_id)
+            if content_hash and user_id else None
+        )
+        if processed:
+            await DocumentOperations.update_document(
+                document_id,
+                DocumentUpdate(
+                    content=processed.content,
+                    metadata=processed.metadata,
+                    status=DocumentStatus.READY
+                ),
+                extra_fields={
+                    "embedding_q8": processed.embedding_q8,
+                    "embedding_scale": processed.embedding_scale
+                }
+            )
+            
+            logger.info(f"Document {document_id} reused processing of {processed.id}")
+            return
+        
         # Extract text content
-        content, metadata = await file_service.extract_text_content(file_path, doc_type)
+        content, metadata = await get_file_service().extract_text_content(file_path, doc_type, content_hash)
         
-        # Generate embeddings
+        # Generate embeddings and store them int8-quantized
         embeddings = await ai_service.generate_embeddings(content[:8000])
+        embedding_q8, embedding_scale = quantize_embedding(embeddings)
         
         # Extract metadata using AI
         if not metadata.title or not metadata.abstract:
@@ -51,11 +92,17 @@ async def process_document_background(document_id: str, file_path: str, doc_type
         update_data = DocumentUpdate(
             content=content,
             metadata=metadata,
-            status=DocumentStatus.READY,
-            content_embedding=embeddings
+            status=DocumentStatus.READY
         )
         
-        await DocumentOperations.update_document(document_id, update_data)
+        await DocumentOperations.update_document(
+            document_id,
+            update_data,
+            extra_fields={
+                "embedding_q8": embedding_q8,
+                "embedding_scale": embedding_scale
+            }
+        )
         
         logger.info(f"Document processed successfully: {document_id}")
         
@@ -65,16 +112,45 @@ async def process_document_background(document_id: str, file_path: str, doc_type
         # Update document status to failed
         await DocumentOperations.update_document(
             document_id,
-            DocumentUpdate(
-                status=DocumentStatus.FAILED,
-                error_message=str(e)
-            )
+            DocumentUpdate(status=DocumentStatus.FAILED),
+            extra_fields={"error_message": str(e)}
+        )
+
+
+async def schedule_document_processing(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    document_id: str,
+    file_path: str,
+    doc_type: str,
+    content_hash: str,
+    user_id: str
+) -> None:
+    """
+    Schedule document processing.
+    Uses the Arq worker queue when it is configured, otherwise runs the
+    processing as an in-process background task.
+    """
+    arq_pool = getattr(request.app.state, "arq_pool", None)
+    
+    if arq_pool is not None:
+        await arq_pool.enqueue_job("process_document", document_id, file_path, doc_type, content_hash, user_id)
+    else:
+        background_tasks.add_task(
+            process_document_background,
+            document_id,
+            file_path,
+            doc_type,
+            content_hash,
+            user_id
         )
 
 
 @router.post("/", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
 async def upload_document(
+    request: Request,
     background_tasks: BackgroundTasks,
+    response: Response,
     file: UploadFile = File(...),
     user: UserInDB = Depends(get_current_user)
 ):
@@ -83,24 +159,45 @@ async def upload_document(
     
     Supported formats: PDF, DOCX, TXT
     Maximum file size: 10MB
+    
+    Re-uploading a file that has already been processed for this user
+    returns the existing document with status 200.
     """
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Save file
-        file_path, content_hash, doc_type = await file_service.save_uploaded_file(
-            content,
-            file.filename,
+        # Stream file to storage
+        file_path, content_hash, doc_type, file_size = await get_file_service().save_uploaded_file(
+            file,
             user.id
         )
         
+        # Skip processing entirely for duplicate uploads
+        existing = await DocumentOperations.get_document_by_hash(content_hash, user.id)
+        if existing:
+            response.status_code = status.HTTP_200_OK
+            
+            logger.info(f"Duplicate upload of document {existing.id} by user {user.username}")
+            
+            return DocumentResponse(
+                id=existing.id,
+                filename=existing.filename,
+                original_filename=existing.original_filename,
+                file_type=existing.file_type,
+                file_size=existing.file_size,
+                status=existing.status,
+                upload_date=existing.upload_date,
+                processed_date=existing.processed_date,
+                metadata=existing.metadata,
+                tags=existing.tags,
+                notes=existing.notes,
+                is_favorite=existing.is_favorite
+            )
+        
         # Create document record
         doc_create = DocumentCreate(
             filename=Path(file_path).name,
             original_filename=file.filename,
             file_type=doc_type,
-            file_size=len(content),
+            file_size=file_size,
             content_hash=content_hash,
             user_id=user.id,
             file_path=file_path
@@ -109,11 +206,14 @@ async def upload_document(
         document = await DocumentOperations.create_document(doc_create)
         
         # Process document in background
-        background_tasks.add_task(
-            process_document_background,
+        await schedule_document_processing(
+            request,
+            background_tasks,
             document.id,
             file_path,
-            doc_type
+            doc_type,
+            content_hash,
+            user.id
         )
         
         logger.info(f"Document uploaded: {document.id} by user {user.username}")
@@ -148,6 +248,7 @@ async def upload_document(
 
 @router.post("/batch", response_model=List[DocumentResponse])
 async def upload_documents_batch(
+    request: Request,
     background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     user: UserInDB = Depends(get_current_user)
@@ -163,26 +264,38 @@ async def upload_documents_batch(
             detail="Maximum 5 files per batch"
         )
     
-    uploaded_documents = []
-    
-    for file in files:
+    async def upload_one(file: UploadFile) -> Optional[DocumentResponse]:
         try:
-            # Read file content
-            content = await file.read()
-            
-            # Save file
-            file_path, content_hash, doc_type = await file_service.save_uploaded_file(
-                content,
-                file.filename,
+            # Stream file to storage
+            file_path, content_hash, doc_type, file_size = await get_file_service().save_uploaded_file(
+                file,
                 user.id
             )
             
+            # Reuse already processed duplicates
+            existing = await DocumentOperations.get_document_by_hash(content_hash, user.id)
+            if existing:
+                return DocumentResponse(
+                    id=existing.id,
+                    filename=existing.filename,
+                    original_filename=existing.original_filename,
+                    file_type=existing.file_type,
+                    file_size=existing.file_size,
+                    status=existing.status,
+                    upload_date=existing.upload_date,
+                    processed_date=existing.processed_date,
+                    metadata=existing.metadata,
+                    tags=existing.tags,
+                    notes=existing.notes,
+                    is_favorite=existing.is_favorite
+                )
+            
             # Create document record
             doc_create = DocumentCreate(
                 filename=Path(file_path).name,
                 original_filename=file.filename,
                 file_type=doc_type,
-                file_size=len(content),
+                file_size=file_size,
                 content_hash=content_hash,
                 user_id=user.id,
                 file_path=file_path
@@ -191,14 +304,17 @@ async def upload_documents_batch(
             document = await DocumentOperations.create_document(doc_create)
             
             # Process document in background
-            background_tasks.add_task(
-                process_document_background,
+            await schedule_document_processing(
+                request,
+                background_tasks,
                 document.id,
                 file_path,
-                doc_type
+                doc_type,
+                content_hash,
+                user.id
             )
             
-            uploaded_documents.append(DocumentResponse(
+            return DocumentResponse(
                 id=document.id,
                 filename=document.filename,
                 original_filename=document.original_filename,
@@ -211,13 +327,17 @@ async def upload_documents_batch(
                 tags=document.tags,
                 notes=document.notes,
                 is_favorite=document.is_favorite
-            ))
+            )
             
         except Exception as e:
             logger.error(f"Error uploading {file.filename}: {e}")
             # Continue with other files
+            return None
+    
+    # Files are independent, so store and record them concurrently
+    results = await asyncio.gather(*(upload_one(file) for file in files))
     
-    return uploaded_documents
+    return [document for document in results if document is not None]
 
 
 @router.get("/", response_model=DocumentListResponse)
@@ -370,6 +490,25 @@ async def download_document(
             detail="File not found"
         )
     
+    # Behind nginx, hand the transfer off so it is streamed with sendfile
+    if settings.download_accel_redirect_prefix:
+        relative_path = file_path.resolve().relative_to(Path(settings.upload_folder).resolve())
+        
+        filename = quote(document.original_filename)
+        if filename != document.original_filename:
+            content_disposition = f"attachment; filename*=utf-8''{filename}"
+        else:
+            content_disposition = f'attachment; filename="{filename}"'
+        
+        return Response(
+            media_type="application/octet-stream",
+            headers={
+                "X-Accel-Redirect": f"{settings.download_accel_redirect_prefix.rstrip('/')}/{relative_path.as_posix()}",
+                "Content-Disposition": content_disposition
+            }
+        )
+    
+    # FileResponse uses the ASGI pathsend extension when the server supports it
     return FileResponse(
         path=file_path,
         filename=document.original_filename,
@@ -386,23 +525,20 @@ async def update_document(
     """
     Update document metadata, tags, or notes.
     """
-    document = await DocumentOperations.get_document(document_id)
+    # Ownership is enforced by the update query itself
+    updated_document = await DocumentOperations.update_if_owner(
+        document_id,
+        user.id,
+        user.role == "admin",
+        update_data
+    )
     
-    if not document:
+    if not updated_document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
     
-    # Check ownership
-    if document.user_id != user.id and user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    updated_document = await DocumentOperations.update_document(document_id, update_data)
-    
     return DocumentResponse(
         id=updated_document.id,
         filename=updated_document.filename,
@@ -426,8 +562,15 @@ async def delete_document(
 ):
     """
     Delete a document (soft delete).
+    The stored file may be shared, so it is left for the blob collector,
+    which removes it once no document refers to it.
     """
-    document = await DocumentOperations.get_document(document_id)
+    # Ownership is enforced by the delete query itself
+    document = await DocumentOperations.delete_if_owner(
+        document_id,
+        user.id,
+        user.role == "admin"
+    )
     
     if not document:
         raise HTTPException(
@@ -435,24 +578,9 @@ async def delete_document(
             detail="Document not found"
         )
     
-    # Check ownership
-    if document.user_id != user.id and user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    success = await DocumentOperations.delete_document(document_id)
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete document"
-        )
-    
-    # Update user storage
+    # Update the owner's storage
     await UserOperations.increment_user_stats(
-        user.id,
+        document.user_id,
         "storage_used_mb",
         -(document.file_size / (1024 * 1024))
     )
@@ -500,8 +628,6 @@ async def find_similar_documents(
     """
     Find similar documents based on content similarity.
     """
-    # This would use vector similarity search on embeddings
-    # Simplified implementation for now
     document = await DocumentOperations.get_document(document_id)
     
     if not document:
@@ -517,9 +643,49 @@ async def find_similar_documents(
             detail="Access denied"
         )
     
-    # In a real implementation, use vector database for similarity search
-    # For now, return empty list
-    return []
+    if not document.embedding_q8:
+        return []
+    
+    # Brute-force cosine similarity over the owner's quantized embeddings
+    candidates = [
+        doc for doc in await DocumentOperations.get_embedded_documents(document.user_id)
+        if doc.id != document.id
+    ]
+    
+    if not candidates:
+        return []
+    
+    scores = cosine_similarities(
+        dequantize_embedding(document.embedding_q8, document.embedding_scale),
+        [dequantize_embedding(doc.embedding_q8, doc.embedding_scale) for doc in candidates]
+    )
+    
+    ranked = sorted(
+        (
+            (score, doc) for score, doc in zip(scores, candidates)
+            if score >= request.min_similarity
+        ),
+        key=lambda pair: pair[0],
+        reverse=True
+    )[:request.top_k]
+    
+    return [
+        DocumentResponse(
+            id=doc.id,
+            filename=doc.filename,
+            original_filename=doc.original_filename,
+            file_type=doc.file_type,
+            file_size=doc.file_size,
+            status=doc.status,
+            upload_date=doc.upload_date,
+            processed_date=doc.processed_date,
+            metadata=doc.metadata,
+            tags=doc.tags,
+            notes=doc.notes,
+            is_favorite=doc.is_favorite
+        )
+        for _, doc in ranked
+    ]
 
 
 @router.get("/{document_id}/analytics", response_model=DocumentAnalytics)
@@ -545,8 +711,10 @@ async def get_document_analytics(
             detail="Access denied"
         )
     
-    # Calculate analytics
-    word_count = len(document.content.split()) if document.content else 0
+    # Calculate analytics (word count is stored at ingestion time)
+    word_count = document.metadata.total_words
+    if word_count is None:
+        word_count = sum(1 for _ in _WORD_RE.finditer(document.content)) if document.content else 0
     reading_time = word_count // 250  # Average reading speed
     
     return DocumentAnalytics(
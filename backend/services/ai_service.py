@@ -6,11 +6,14 @@ Handles summary generation, text processing, and embeddings.
 
 import openai
 from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import re
 import tiktoken
 import logging
-import json
-from datetime import datetime
+import orjson
+import time
 import asyncio
+from functools import lru_cache
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..config.settings import settings
@@ -23,6 +26,95 @@ logger = logging.getLogger(__name__)
 openai.api_key = settings.openai_api_key
 
 
+def _load_encoding(model: str) -> tiktoken.Encoding:
+    """Resolve the tokenizer for a model, defaulting to cl100k_base."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+# Tokenizer shared by all AIService instances
+_ENCODING = _load_encoding(settings.openai_model)
+
+# Completion token budget per summary length (CUSTOM is derived per request)
+_LENGTH_TOKENS: Dict[SummaryLength, int] = {
+    SummaryLength.SHORT: 200,
+    SummaryLength.MEDIUM: 600,
+    SummaryLength.LONG: 1000
+}
+
+# Target summary length in words (CUSTOM uses target_word_count)
+_LENGTH_WORDS: Dict[SummaryLength, int] = {
+    SummaryLength.SHORT: 100,
+    SummaryLength.MEDIUM: 300,
+    SummaryLength.LONG: 500
+}
+
+# Bullet or numbered list item in an abstractive summary
+_BULLET_RE = re.compile(r'^\s*(?:[•\-*]|\d+\.)\s+(.*)$')
+
+# Prompt templates
+_BASE_SUMMARY_PROMPT = "Please summarize the following research paper."
+_SUMMARY_PROMPT_TEMPLATE = "{prefix}{title}{authors}\n\nDocument content:\n{content}..."
+
+_BASE_SYSTEM_PROMPT = "You are an expert research paper summarizer."
+_SYSTEM_PROMPTS: Dict[SummaryType, str] = {
+    SummaryType.EXTRACTIVE: f"{_BASE_SYSTEM_PROMPT} Extract key sentences and return a structured JSON summary.",
+    SummaryType.ABSTRACTIVE: f"{_BASE_SYSTEM_PROMPT} Create a flowing, coherent summary that captures the essence of the paper.",
+    SummaryType.MIXED: f"{_BASE_SYSTEM_PROMPT} Create a mixed summary combining extraction and abstraction."
+}
+
+
+def quantize_embedding(embedding: List[float]) -> Tuple[bytes, float]:
+    """
+    Quantize an embedding to int8 with a per-vector scale.
+    Returns the raw int8 bytes and the scale needed to restore the values.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    scale = float(np.max(np.abs(vector))) / 127 or 1.0
+    quantized = np.round(vector / scale).astype(np.int8)
+    return quantized.tobytes(), scale
+
+
+def dequantize_embedding(data: bytes, scale: float) -> np.ndarray:
+    """Restore an int8-quantized embedding to float32."""
+    return np.frombuffer(data, dtype=np.int8).astype(np.float32) * scale
+
+
+def cosine_similarities(query: np.ndarray, candidates: List[np.ndarray]) -> np.ndarray:
+    """Compute cosine similarity between a query vector and each candidate."""
+    matrix = np.vstack(candidates)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return (matrix @ query) / np.where(norms == 0, 1.0, norms)
+
+
+@lru_cache(maxsize=256)
+def _summary_prompt_prefix(
+    instruction: str,
+    target_words: int,
+    simplify_technical: bool,
+    focus_topics: Tuple[str, ...],
+    exclude_topics: Tuple[str, ...]
+) -> str:
+    """Build the parameter-dependent part of the summary prompt."""
+    prompt_parts = [
+        instruction,
+        f"Target length: approximately {target_words} words."
+    ]
+    
+    if simplify_technical:
+        prompt_parts.append("Simplify technical jargon for a general audience.")
+    
+    if focus_topics:
+        prompt_parts.append(f"Focus on these topics: {', '.join(focus_topics)}")
+    
+    if exclude_topics:
+        prompt_parts.append(f"Exclude these topics: {', '.join(exclude_topics)}")
+    
+    return "\n".join(prompt_parts)
+
+
 class AIService:
     """Service for AI-powered text processing and generation."""
     
@@ -30,11 +122,10 @@ class AIService:
         self.model = settings.openai_model
         self.max_tokens = settings.openai_max_tokens
         self.temperature = settings.openai_temperature
-        self.encoding = tiktoken.encoding_for_model(self.model)
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in text."""
-        return len(self.encoding.encode(text))
+        return len(_ENCODING.encode(text))
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     async def generate_summary(
@@ -48,7 +139,7 @@ class AIService:
         Generate a summary using OpenAI API.
         Returns the summary content and generation metadata.
         """
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         
         # Prepare the prompt
         prompt = self._build_summary_prompt(
@@ -85,7 +176,7 @@ class AIService:
             
             # Process based on summary type
             if parameters.summary_type == SummaryType.EXTRACTIVE:
-                summary_data = json.loads(content)
+                summary_data = orjson.loads(content)
             else:
                 summary_data = self._parse_abstractive_summary(content)
             
@@ -114,7 +205,7 @@ class AIService:
             
             # Generation metadata
             generation_metadata = {
-                "generation_time_seconds": (datetime.utcnow() - start_time).total_seconds(),
+                "generation_time_seconds": time.perf_counter() - start_time,
                 "model_used": self.model,
                 "prompt_tokens": prompt_tokens,
                 "completion_tokens": completion_tokens,
@@ -167,7 +258,7 @@ class AIService:
                 response_format={"type": "json_object"}
             )
             
-            metadata_dict = json.loads(response.choices[0].message.content)
+            metadata_dict = orjson.loads(response.choices[0].message.content)
             
             return DocumentMetadata(
                 title=metadata_dict.get("title"),
@@ -242,73 +333,41 @@ class AIService:
         custom_prompt: Optional[str]
     ) -> str:
         """Build the prompt for summary generation."""
-        # Start with base prompt
-        prompt_parts = []
-        
-        if custom_prompt:
-            prompt_parts.append(custom_prompt)
+        if parameters.summary_length == SummaryLength.CUSTOM:
+            target_words = parameters.target_word_count or 300
         else:
-            prompt_parts.append("Please summarize the following research paper.")
-        
-        # Add parameters
-        length_words = {
-            SummaryLength.SHORT: 100,
-            SummaryLength.MEDIUM: 300,
-            SummaryLength.LONG: 500,
-            SummaryLength.CUSTOM: parameters.target_word_count or 300
-        }
-        
-        target_words = length_words.get(parameters.summary_length, 300)
-        prompt_parts.append(f"Target length: approximately {target_words} words.")
-        
-        if parameters.simplify_technical:
-            prompt_parts.append("Simplify technical jargon for a general audience.")
-        
-        if parameters.focus_topics:
-            prompt_parts.append(f"Focus on these topics: {', '.join(parameters.focus_topics)}")
+            target_words = _LENGTH_WORDS.get(parameters.summary_length, 300)
         
-        if parameters.exclude_topics:
-            prompt_parts.append(f"Exclude these topics: {', '.join(parameters.exclude_topics)}")
-        
-        # Add document info
-        if metadata.title:
-            prompt_parts.append(f"\nTitle: {metadata.title}")
-        
-        if metadata.authors:
-            prompt_parts.append(f"Authors: {', '.join(metadata.authors[:5])}")
-        
-        # Add content
-        prompt_parts.append(f"\nDocument content:\n{content[:8000]}...")
+        # Parameter-dependent instructions are cached across requests
+        prefix = _summary_prompt_prefix(
+            custom_prompt or _BASE_SUMMARY_PROMPT,
+            target_words,
+            parameters.simplify_technical,
+            tuple(parameters.focus_topics),
+            tuple(parameters.exclude_topics)
+        )
         
-        return "\n".join(prompt_parts)
+        return _SUMMARY_PROMPT_TEMPLATE.format(
+            prefix=prefix,
+            title=f"\n\nTitle: {metadata.title}" if metadata.title else "",
+            authors=f"\nAuthors: {', '.join(metadata.authors[:5])}" if metadata.authors else "",
+            content=content[:8000]
+        )
     
     def _get_system_prompt(self, parameters: SummaryParameters) -> str:
         """Get the system prompt based on parameters."""
-        base_prompt = "You are an expert research paper summarizer."
-        
-        if parameters.summary_type == SummaryType.EXTRACTIVE:
-            return f"{base_prompt} Extract key sentences and return a structured JSON summary."
-        elif parameters.summary_type == SummaryType.ABSTRACTIVE:
-            return f"{base_prompt} Create a flowing, coherent summary that captures the essence of the paper."
-        else:
-            return f"{base_prompt} Create a mixed summary combining extraction and abstraction."
+        return _SYSTEM_PROMPTS.get(parameters.summary_type, _SYSTEM_PROMPTS[SummaryType.MIXED])
     
     def _calculate_max_tokens(self, parameters: SummaryParameters) -> int:
         """Calculate max tokens based on summary length."""
-        length_tokens = {
-            SummaryLength.SHORT: 200,
-            SummaryLength.MEDIUM: 600,
-            SummaryLength.LONG: 1000,
-            SummaryLength.CUSTOM: min(parameters.target_word_count * 2 if parameters.target_word_count else 600, 2000)
-        }
+        if parameters.summary_length == SummaryLength.CUSTOM:
+            return min(parameters.target_word_count * 2 if parameters.target_word_count else 600, 2000)
         
-        return length_tokens.get(parameters.summary_length, 600)
+        return _LENGTH_TOKENS.get(parameters.summary_length, 600)
     
     def _parse_abstractive_summary(self, content: str) -> Dict[str, Any]:
         """Parse abstractive summary into structured format."""
         # Simple parsing - in production, use more sophisticated NLP
-        lines = content.strip().split("\n")
-        
         summary_data = {
             "summary": content,
             "key_points": [],
@@ -316,10 +375,11 @@ class AIService:
         }
         
         # Extract key points (lines starting with bullets or numbers)
-        for line in lines:
-            if line.strip().startswith(("•", "-", "*", "1.", "2.", "3.")):
+        for line in content.split("\n"):
+            match = _BULLET_RE.match(line)
+            if match:
                 summary_data["key_points"].append({
-                    "text": line.strip().lstrip("•-*123456789. "),
+                    "text": match.group(1).strip(),
                     "importance": 0.8
                 })
         
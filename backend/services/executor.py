@@ -0,0 +1,45 @@
+# backend/services/executor.py
+"""
+Shared executors for running blocking work off the event loop.
+Threads serve work that releases the GIL (hashing, bcrypt, file I/O);
+processes serve PDF parsing and OCR.
+"""
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_CPU_POOL = ThreadPoolExecutor(
+    max_workers=max(4, os.cpu_count() or 1),
+    thread_name_prefix="cpu"
+)
+
+# PDF parsing and OCR hold the GIL, so they run in worker processes
+PROCESS_WORKERS = min(os.cpu_count() or 1, 4)
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool, creating it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS)
+    return _process_pool
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any) -> T:
+    """Run a blocking function in the shared thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_CPU_POOL, fn, *args)
+
+
+async def run_in_process(fn: Callable[..., T], *args: Any) -> T:
+    """
+    Run a function in the shared process pool.
+    The function and its arguments must be picklable.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_process_pool(), fn, *args)
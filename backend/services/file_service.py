@@ -4,28 +4,247 @@ File service for handling document uploads and processing.
 Supports PDF, DOCX, and TXT files.
 """
 
+import io
 import os
+import re
+import functools
+import sys
 import hashlib
+import secrets
 import shutil
+import tempfile
+import zipfile
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List, Set
 import logging
 import asyncio
+import time
 from datetime import datetime
 
 # Document processing libraries
-import PyPDF2
-from docx import Document as DocxDocument
+import pypdfium2 as pdfium
+from lxml import etree
 import pdfplumber
-import aiofiles
 from PIL import Image
 import pytesseract
+import orjson
+from fastapi import UploadFile
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
 
 from ..config.settings import settings
 from ..models.document import DocumentType, DocumentMetadata, DocumentSection
+from ..database.cache import cache_get, cache_set
+from ..database.operations import DocumentOperations
+from .executor import run_cpu, run_in_process
 
 logger = logging.getLogger(__name__)
 
+# Common section headers
+SECTION_KEYWORDS = (
+    "abstract", "introduction", "methodology", "methods",
+    "results", "discussion", "conclusion", "references",
+    "acknowledgments", "appendix"
+)
+
+# Common casings of section headers, for a direct startswith check
+_SECTION_STARTS = tuple(keyword.capitalize() for keyword in SECTION_KEYWORDS) + tuple(
+    keyword.upper() for keyword in SECTION_KEYWORDS
+)
+
+# Lines longer than this are never treated as section headers
+MAX_HEADER_LENGTH = 60
+
+# Compiled once: any section keyword, the abstract heading, numbered
+# section headings, and the markers that end an abstract
+_SECTION_KEYWORDS_RE = re.compile("|".join(SECTION_KEYWORDS), re.IGNORECASE)
+_ABSTRACT_RE = re.compile(r'\babstract\b', re.IGNORECASE)
+_NUMBERED_HEADER_RE = re.compile(r'(?:\d+\.)+\d*\s+[A-Z]')
+_ABSTRACT_END_RE = re.compile(r'introduction|keywords|1\.|\n\n\n', re.IGNORECASE)
+
+# The abstract heading is only looked for in the opening characters
+ABSTRACT_SEARCH_CHARS = 10_000
+
+# Extraction results cached by content hash; bump the version whenever
+# extraction output changes so stale entries are ignored
+EXTRACT_CACHE_PREFIX = "extract:v4:"
+
+# DOCX parts are read straight from the archive XML
+_DOCX_NS = {
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "dc": "http://purl.org/dc/elements/1.1/"
+}
+_DOCX_PARAGRAPHS = etree.XPath("w:body/w:p", namespaces=_DOCX_NS)
+_DOCX_STYLE = etree.XPath("string(w:pPr/w:pStyle/@w:val)", namespaces=_DOCX_NS)
+# Run text plus the tabs and breaks python-docx renders as whitespace
+_DOCX_RUN_CONTENT = etree.XPath(
+    ".//w:r/w:t | .//w:r/w:tab | .//w:r/w:br | .//w:r/w:cr",
+    namespaces=_DOCX_NS
+)
+_DOCX_RUN_BREAKS = {
+    "{%s}tab" % _DOCX_NS["w"]: "\t",
+    "{%s}br" % _DOCX_NS["w"]: "\n",
+    "{%s}cr" % _DOCX_NS["w"]: "\n"
+}
+_DOCX_STYLES = etree.XPath("w:style[@w:styleId]", namespaces=_DOCX_NS)
+_DOCX_STYLE_NAME = etree.XPath("string(w:name/@w:val)", namespaces=_DOCX_NS)
+_DOCX_STYLE_ID = "{%s}styleId" % _DOCX_NS["w"]
+_DOCX_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+# Chunk size used when writing and hashing uploads
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Linux sendfile can copy between regular files without entering userspace
+_SENDFILE_TO_FILE = sys.platform.startswith("linux") and hasattr(os, "sendfile")
+
+# Number of pages handled by a single worker when extracting large PDFs
+PDF_PAGE_WINDOW = 64
+
+# Longest line (in words) that can be treated as a font-size heading
+MAX_HEADING_WORDS = 12
+
+
+def _is_on_disk(file) -> bool:
+    """
+    Check whether an upload's file object is backed by a file on disk.
+    Starlette spools uploads in a SpooledTemporaryFile, whose fileno()
+    would force an in-memory upload to disk, so its backing file is
+    checked instead.
+    """
+    if isinstance(file, tempfile.SpooledTemporaryFile):
+        return not isinstance(file._file, (io.BytesIO, io.StringIO))
+    
+    try:
+        file.fileno()
+    except (io.UnsupportedOperation, AttributeError, OSError):
+        return False
+    return True
+
+
+def _extract_page_window(file_path: str, start: int, stop: int) -> List[List[Tuple[str, float]]]:
+    """
+    Extract (line text, font size) pairs for pages [start, stop) using a
+    dedicated PyMuPDF handle.
+    """
+    pages = []
+    
+    with fitz.open(file_path) as doc:
+        for i in range(start, stop):
+            lines = []
+            
+            for block in doc[i].get_text("dict")["blocks"]:
+                # Image blocks have no lines
+                for line in block.get("lines", []):
+                    spans = line["spans"]
+                    text = "".join(span["text"] for span in spans)
+                    if text.strip():
+                        lines.append((text, max(span["size"] for span in spans)))
+            
+            pages.append(lines)
+    
+    return pages
+
+
+def _heading_font_sizes(pages: List[List[Tuple[str, float]]]) -> Set[float]:
+    """
+    Find the font sizes used for headings.
+    The body size is the one covering the most characters; headings use
+    the three largest sizes above it.
+    """
+    chars_per_size: Dict[float, int] = {}
+    for lines in pages:
+        for text, size in lines:
+            size = round(size, 1)
+            chars_per_size[size] = chars_per_size.get(size, 0) + len(text)
+    
+    if not chars_per_size:
+        return set()
+    
+    body_size = max(chars_per_size, key=chars_per_size.get)
+    larger_sizes = sorted((size for size in chars_per_size if size > body_size), reverse=True)
+    
+    return set(larger_sizes[:3])
+
+
+def _pymupdf_page_count(file_path: str) -> int:
+    """Count the pages of a PDF with PyMuPDF."""
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def _pdfplumber_page_count(file_path: str) -> int:
+    """Count the pages of a PDF with pdfplumber."""
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_page_text(file_path: str, page_idx: int) -> str:
+    """
+    Extract the text of a single page with pdfplumber.
+    Runs in a worker process, so the PDF is opened there rather than pickled.
+    """
+    with pdfplumber.open(file_path) as pdf:
+        return pdf.pages[page_idx].extract_text() or ""
+
+
+def _extract_pages_pdfium(file_path: str) -> List[str]:
+    """
+    Extract the text of every page with pypdfium2.
+    PDFium is not thread-safe, so this runs in a worker process.
+    """
+    page_texts = []
+    
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            page_texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    
+    return page_texts
+
+
+# LSTM engine, single uniform block of text
+TESSERACT_CONFIG = "--oem 1 --psm 6"
+
+# PIL modes for pixmap samples by component count (GRAY or RGB, +alpha)
+_PIXMAP_MODES = {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}
+
+
+def _ocr_page(file_path: str, page_num: int) -> str:
+    """
+    Run OCR on the images of a single PDF page.
+    Runs in a worker process, so the PDF is opened there rather than pickled.
+    """
+    text_parts = []
+    
+    with fitz.open(file_path) as pdf_document:
+        page = pdf_document[page_num]
+        
+        for img in page.get_images():
+            # Extract image
+            xref = img[0]
+            pix = fitz.Pixmap(pdf_document, xref)
+            
+            if pix.n - pix.alpha < 4:  # GRAY or RGB
+                # Wrap the raw samples directly, skipping a PNG round trip
+                mode = _PIXMAP_MODES[pix.n]
+                image = Image.frombuffer(
+                    mode, (pix.width, pix.height), pix.samples_mv,
+                    "raw", mode, pix.stride, 1
+                )
+                
+                # Run OCR
+                text_parts.append(pytesseract.image_to_string(image, config=TESSERACT_CONFIG))
+    
+    return '\n'.join(text_parts)
+
 
 class FileService:
     """Service for file handling and document processing."""
@@ -34,149 +253,381 @@ class FileService:
         self.upload_folder = Path(settings.upload_folder)
         self.upload_folder.mkdir(exist_ok=True)
         self.max_file_size = settings.max_upload_size
-        self.allowed_extensions = settings.allowed_extensions
+        self.allowed_extensions = frozenset(settings.allowed_extensions)
+        
+        # Lookup tables for upload types and their extractors
+        self._ext_to_type = {
+            ".pdf": DocumentType.PDF,
+            ".docx": DocumentType.DOCX,
+            ".txt": DocumentType.TXT
+        }
+        self._extractors = {
+            DocumentType.PDF: self._extract_from_pdf,
+            DocumentType.DOCX: self._extract_from_docx,
+            DocumentType.TXT: self._extract_from_txt
+        }
     
     async def save_uploaded_file(
         self,
-        file_content: bytes,
-        filename: str,
+        upload_file: UploadFile,
         user_id: str
-    ) -> Tuple[str, str, DocumentType]:
+    ) -> Tuple[str, str, DocumentType, int]:
         """
-        Save uploaded file and return file path, content hash, and type.
+        Save uploaded file and return file path, content hash, type, and size.
+        Uploads already on disk are copied in the kernel; in-memory uploads
+        are streamed in chunks. Files are stored content-addressed, so
+        identical uploads share one stored copy.
         """
         # Validate file
-        file_ext = Path(filename).suffix.lower()
-        if file_ext not in self.allowed_extensions:
+        file_ext = Path(upload_file.filename).suffix.lower()
+        if file_ext not in self.allowed_extensions or file_ext not in self._ext_to_type:
             raise ValueError(f"File type {file_ext} not allowed")
         
-        if len(file_content) > self.max_file_size:
+        # Write to a temporary name, so a partial file is never visible
+        blob_folder = self.upload_folder / "blobs"
+        blob_folder.mkdir(exist_ok=True)
+        tmp_path = blob_folder / f"{secrets.token_hex(8)}.tmp"
+        
+        try:
+            if _is_on_disk(upload_file.file):
+                content_hash, file_size = await run_cpu(
+                    self._copy_spooled_upload, upload_file.file, tmp_path
+                )
+            else:
+                content_hash, file_size = await self._stream_upload(upload_file, tmp_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        
+        file_path = self._blob_path(content_hash, file_ext)
+        
+        try:
+            # Touching a reused file keeps the blob collector away from it
+            # until its new document is recorded
+            os.utime(file_path)
+        except FileNotFoundError:
+            file_path.parent.mkdir(exist_ok=True)
+            os.replace(tmp_path, file_path)
+            logger.info(f"Saved file: {file_path}")
+        else:
+            tmp_path.unlink()
+            logger.info(f"Reusing stored file: {file_path}")
+        
+        # Determine file type
+        doc_type = self._ext_to_type[file_ext]
+        
+        return str(file_path), content_hash, doc_type, file_size
+    
+    def _check_file_size(self, file_size: int) -> None:
+        """Reject files over the upload limit."""
+        if file_size > self.max_file_size:
             raise ValueError(f"File size exceeds maximum of {self.max_file_size} bytes")
+    
+    async def _stream_upload(self, upload_file: UploadFile, tmp_path: Path) -> Tuple[str, int]:
+        """Write an upload in chunks while hashing it; returns (hash, size)."""
+        hasher = hashlib.sha256()
+        file_size = 0
         
-        # Calculate content hash
-        content_hash = hashlib.sha256(file_content).hexdigest()
+        # Opening, writing, and closing all block, so each runs in the pool
+        f = await run_cpu(open, tmp_path, 'wb')
+        try:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                self._check_file_size(file_size)
+                
+                await run_cpu(self._write_chunk, f, hasher, chunk)
+        finally:
+            await run_cpu(f.close)
         
-        # Create user directory
-        user_folder = self.upload_folder / user_id
-        user_folder.mkdir(exist_ok=True)
+        return hasher.hexdigest(), file_size
+    
+    def _copy_spooled_upload(self, src, tmp_path: Path) -> Tuple[str, int]:
+        """
+        Copy an upload that is already on disk, then hash the copy;
+        returns (hash, size). Blocking.
+        """
+        src_fd = src.fileno()
+        file_size = os.fstat(src_fd).st_size
+        self._check_file_size(file_size)
+        
+        with open(tmp_path, 'wb') as dst:
+            if _SENDFILE_TO_FILE:
+                offset = 0
+                while offset < file_size:
+                    sent = os.sendfile(dst.fileno(), src_fd, offset, file_size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            else:
+                src.seek(0)
+                shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
         
-        # Generate unique filename
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        safe_filename = f"{timestamp}_{content_hash[:8]}_{filename}"
-        file_path = user_folder / safe_filename
+        with open(tmp_path, 'rb') as f:
+            # hashlib.file_digest is only available from Python 3.11
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, "sha256").hexdigest(), file_size
+            
+            hasher = hashlib.sha256()
+            while chunk := f.read(UPLOAD_CHUNK_SIZE):
+                hasher.update(chunk)
+            return hasher.hexdigest(), file_size
+    
+    def _write_chunk(self, f, hasher, chunk: bytes) -> None:
+        """Hash and write one upload chunk (blocking)."""
+        view = memoryview(chunk)
+        hasher.update(view)
+        f.write(view)
+    
+    def _blob_path(self, content_hash: str, file_ext: str) -> Path:
+        """Get the content-addressed storage path for a file."""
+        return self.upload_folder / "blobs" / content_hash[:2] / f"{content_hash}{file_ext}"
+    
+    async def remove_orphaned_blobs(self, grace_seconds: int) -> int:
+        """
+        Delete stored files that no document refers to.
+        Files modified within grace_seconds are kept, so uploads that are
+        still being recorded never lose their file.
+        """
+        cutoff = time.time() - grace_seconds
+        removed = 0
         
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(file_content)
+        for path in await run_cpu(self._stale_blobs, cutoff):
+            if await DocumentOperations.count_file_references(str(path)):
+                continue
+            
+            if await run_cpu(self._unlink_if_stale, path, cutoff):
+                logger.info(f"Removed orphaned file: {path}")
+                removed += 1
         
-        logger.info(f"Saved file: {file_path}")
+        return removed
+    
+    def _stale_blobs(self, cutoff: float) -> List[Path]:
+        """List stored files last modified before cutoff (blocking)."""
+        stale = []
+        
+        for path in (self.upload_folder / "blobs").glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    stale.append(path)
+            except FileNotFoundError:
+                continue
         
-        # Determine file type
-        doc_type = DocumentType(file_ext[1:])  # Remove dot
+        return stale
+    
+    def _unlink_if_stale(self, path: Path, cutoff: float) -> bool:
+        """Delete a stored file unless an upload reused it meanwhile (blocking)."""
+        try:
+            if path.stat().st_mtime >= cutoff:
+                return False
+            path.unlink()
+        except FileNotFoundError:
+            return False
         
-        return str(file_path), content_hash, doc_type
+        return True
     
     async def extract_text_content(
         self,
         file_path: str,
-        doc_type: DocumentType
+        doc_type: DocumentType,
+        content_hash: Optional[str] = None
     ) -> Tuple[str, DocumentMetadata]:
         """
         Extract text content and metadata from document.
+        When the content hash is given, results are cached under it, so an
+        identical file is only extracted once.
         """
         file_path_obj = Path(file_path)
         
         if not file_path_obj.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
+        cache_key = f"{EXTRACT_CACHE_PREFIX}{content_hash}" if content_hash else None
+        if cache_key:
+            cached = await cache_get(cache_key)
+            if cached:
+                data = orjson.loads(cached)
+                return data["content"], DocumentMetadata(**data["metadata"])
+        
+        extractor = self._extractors.get(doc_type)
+        if extractor is None:
+            raise ValueError(f"Unsupported document type: {doc_type}")
+        
         try:
-            if doc_type == DocumentType.PDF:
-                return await self._extract_from_pdf(file_path_obj)
-            elif doc_type == DocumentType.DOCX:
-                return await self._extract_from_docx(file_path_obj)
-            elif doc_type == DocumentType.TXT:
-                return await self._extract_from_txt(file_path_obj)
-            else:
-                raise ValueError(f"Unsupported document type: {doc_type}")
-                
+            content, metadata = await extractor(file_path_obj)
         except Exception as e:
             logger.error(f"Error extracting content from {file_path}: {e}")
             raise
+        
+        if cache_key:
+            await cache_set(
+                cache_key,
+                orjson.dumps({"content": content, "metadata": metadata.model_dump()}),
+                settings.extract_cache_ttl
+            )
+        
+        return content, metadata
     
     async def _extract_from_pdf(self, file_path: Path) -> Tuple[str, DocumentMetadata]:
         """Extract content from PDF file."""
         content_parts = []
+        heading_lines: Set[str] = set()
         metadata = DocumentMetadata()
-        sections = []
         
-        try:
-            # Try pdfplumber first for better text extraction
-            with pdfplumber.open(file_path) as pdf:
-                metadata.total_pages = len(pdf.pages)
-                
-                # Extract text from each page
-                current_section = None
-                current_content = []
+        # Prefer PyMuPDF, which is much faster than pdfplumber for plain text
+        if fitz is not None:
+            try:
+                content_parts, heading_lines = await self._read_pdf_pages_pymupdf(file_path)
+            except Exception as e:
+                logger.warning(f"PyMuPDF failed, trying pdfplumber: {e}")
+                content_parts = []
+        
+        # Fall back when nothing was extracted (e.g. PyMuPDF missing or failed)
+        if not any(page.strip() for page in content_parts):
+            try:
+                content_parts = await self._read_pdf_pages_pdfplumber(file_path)
+            except Exception as e:
+                logger.warning(f"pdfplumber failed, trying pypdfium2: {e}")
                 
-                for i, page in enumerate(pdf.pages):
-                    page_text = page.extract_text() or ""
-                    
-                    # Simple section detection (can be improved)
-                    lines = page_text.split('\n')
-                    for line in lines:
-                        # Check if line might be a section header
-                        if self._is_section_header(line):
-                            # Save previous section
-                            if current_section and current_content:
-                                sections.append(DocumentSection(
-                                    title=current_section,
-                                    content='\n'.join(current_content),
-                                    page_numbers=[i]
-                                ))
-                            current_section = line.strip()
-                            current_content = []
-                        else:
-                            current_content.append(line)
-                    
-                    content_parts.append(page_text)
-                
-                # Save last section
-                if current_section and current_content:
-                    sections.append(DocumentSection(
-                        title=current_section,
-                        content='\n'.join(current_content)
-                    ))
-                
-                # Extract metadata from first page
-                if pdf.pages and content_parts:
-                    first_page_text = content_parts[0]
-                    metadata.title = self._extract_title(first_page_text)
-                    metadata.abstract = self._extract_abstract('\n'.join(content_parts))
-                
-        except Exception as e:
-            logger.warning(f"pdfplumber failed, trying PyPDF2: {e}")
-            
-            # Fallback to PyPDF2
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                metadata.total_pages = len(pdf_reader.pages)
-                
-                for i, page in enumerate(pdf_reader.pages):
-                    text = page.extract_text()
-                    content_parts.append(text)
+                # Fallback to PDFium
+                content_parts = await run_in_process(_extract_pages_pdfium, str(file_path))
+        
+        metadata.total_pages = len(content_parts)
+        metadata.sections = self._detect_pdf_sections(content_parts, heading_lines)
         
         # Combine all content
         full_content = '\n\n'.join(content_parts)
         
+        # Extract metadata from the start of the document
+        metadata.title, metadata.abstract = self._extract_head_metadata(full_content)
+        
         # Calculate statistics
         metadata.total_words = len(full_content.split())
-        metadata.sections = sections
         
         return full_content, metadata
     
+    async def _read_pdf_pages_pymupdf(self, file_path: Path) -> Tuple[List[str], Set[str]]:
+        """
+        Extract page texts and heading lines with PyMuPDF.
+        Large PDFs are split into windows of PDF_PAGE_WINDOW pages that are
+        extracted in parallel; page order is preserved. Heading lines are
+        short lines set in one of the document's heading font sizes.
+        """
+        # Opening parses the cross-reference table, so it stays off the loop
+        page_count = await run_in_process(_pymupdf_page_count, str(file_path))
+        
+        # PyMuPDF holds the GIL and is not thread-safe, so windows are
+        # extracted in worker processes, each with its own document handle
+        windows = [
+            run_in_process(
+                _extract_page_window,
+                str(file_path),
+                start,
+                min(start + PDF_PAGE_WINDOW, page_count)
+            )
+            for start in range(0, page_count, PDF_PAGE_WINDOW)
+        ]
+        
+        results = await asyncio.gather(*windows)
+        pages = [page_lines for window in results for page_lines in window]
+        
+        heading_sizes = _heading_font_sizes(pages)
+        heading_lines = {
+            text.strip()
+            for lines in pages
+            for text, size in lines
+            if round(size, 1) in heading_sizes and len(text.split()) <= MAX_HEADING_WORDS
+        }
+        
+        page_texts = ['\n'.join(text for text, _ in lines) for lines in pages]
+        
+        return page_texts, heading_lines
+    
+    async def _read_pdf_pages_pdfplumber(self, file_path: Path) -> List[str]:
+        """
+        Extract page texts with pdfplumber.
+        Each page is parsed in the process pool; page order is preserved.
+        """
+        page_count = await run_in_process(_pdfplumber_page_count, str(file_path))
+        
+        pages = [
+            run_in_process(_extract_page_text, str(file_path), i)
+            for i in range(page_count)
+        ]
+        
+        return list(await asyncio.gather(*pages))
+    
+    def _detect_pdf_sections(
+        self,
+        page_texts: List[str],
+        heading_lines: Optional[Set[str]] = None
+    ) -> List[DocumentSection]:
+        """
+        Split PDF page texts into sections.
+        A line starts a section if it is a known heading line (from font
+        sizes) or matches the header heuristics.
+        """
+        heading_lines = heading_lines or set()
+        
+        # Body lines are kept in one list; sections are (title, start, end,
+        # page) spans over it and are joined only once, when returned
+        all_lines: List[str] = []
+        spans = []
+        current_section = None
+        current_start = 0
+        current_page = 0
+        
+        for i, page_text in enumerate(page_texts):
+            for line in page_text.splitlines():
+                stripped = line.strip()
+                
+                # Check if line might be a section header
+                if stripped in heading_lines or self._is_section_header(line):
+                    # Close previous section
+                    if current_section and current_start < len(all_lines):
+                        spans.append((current_section, current_start, len(all_lines), current_page))
+                    current_section = stripped
+                    current_start = len(all_lines)
+                    current_page = i
+                else:
+                    all_lines.append(line)
+        
+        # Close last section
+        if current_section and current_start < len(all_lines):
+            spans.append((current_section, current_start, len(all_lines), current_page))
+        
+        return [
+            DocumentSection(
+                title=title,
+                content='\n'.join(all_lines[start:end]),
+                page_numbers=[page]
+            )
+            for title, start, end, page in spans
+        ]
+    
     async def _extract_from_docx(self, file_path: Path) -> Tuple[str, DocumentMetadata]:
         """Extract content from DOCX file."""
-        doc = DocxDocument(file_path)
+        return await run_cpu(self._parse_docx, file_path)
+    
+    def _parse_docx(self, file_path: Path) -> Tuple[str, DocumentMetadata]:
+        """
+        Parse a DOCX file (blocking).
+        Reads the document XML directly rather than through python-docx.
+        """
+        with zipfile.ZipFile(file_path) as archive:
+            document = etree.fromstring(archive.read("word/document.xml"), _DOCX_PARSER)
+            
+            try:
+                core = etree.fromstring(archive.read("docProps/core.xml"), _DOCX_PARSER)
+            except KeyError:
+                core = None
+            
+            try:
+                styles = etree.fromstring(archive.read("word/styles.xml"), _DOCX_PARSER)
+            except KeyError:
+                styles = None
+        
+        heading_styles = self._docx_heading_styles(styles)
+        
         content_parts = []
         metadata = DocumentMetadata()
         sections = []
@@ -184,14 +635,23 @@ class FileService:
         current_section = None
         current_content = []
         
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
+        for paragraph in _DOCX_PARAGRAPHS(document):
+            text = "".join(
+                _DOCX_RUN_BREAKS.get(node.tag) or node.text or ""
+                for node in _DOCX_RUN_CONTENT(paragraph)
+            ).strip()
             
             if not text:
                 continue
             
             # Check for section headers (usually have specific styles)
-            if paragraph.style.name.startswith('Heading'):
+            style_id = _DOCX_STYLE(paragraph)
+            if heading_styles is not None:
+                is_heading = style_id in heading_styles
+            else:
+                is_heading = style_id.startswith('Heading')
+            
+            if is_heading:
                 if current_section and current_content:
                     sections.append(DocumentSection(
                         title=current_section,
@@ -212,70 +672,70 @@ class FileService:
         
         # Extract metadata
         full_content = '\n\n'.join(content_parts)
-        metadata.title = self._extract_title(full_content)
-        metadata.abstract = self._extract_abstract(full_content)
+        metadata.title, metadata.abstract = self._extract_head_metadata(full_content)
         metadata.total_words = len(full_content.split())
         metadata.sections = sections
         
         # Extract from document properties
-        core_properties = doc.core_properties
-        if core_properties.author:
-            metadata.authors = [core_properties.author]
+        author = core.findtext("dc:creator", namespaces=_DOCX_NS) if core is not None else None
+        if author:
+            metadata.authors = [author]
         
         return full_content, metadata
     
+    def _docx_heading_styles(self, styles) -> Optional[Set[str]]:
+        """
+        Get the IDs of heading styles from word/styles.xml, or None without
+        a styles part. Style IDs are localized (e.g. "berschrift1"), so
+        headings are matched on the style name, as python-docx does.
+        """
+        if styles is None:
+            return None
+        
+        heading_styles = set()
+        for style in _DOCX_STYLES(styles):
+            name = _DOCX_STYLE_NAME(style)
+            # Built-in heading styles are stored lowercase ("heading 1")
+            if name.startswith(('Heading', 'heading ')):
+                heading_styles.add(style.get(_DOCX_STYLE_ID))
+        
+        return heading_styles
+    
     async def _extract_from_txt(self, file_path: Path) -> Tuple[str, DocumentMetadata]:
         """Extract content from TXT file."""
-        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-            content = await f.read()
+        # Read and parse in one thread hop rather than one per file operation
+        return await run_cpu(self._parse_txt, file_path)
+    
+    def _parse_txt(self, file_path: Path) -> Tuple[str, DocumentMetadata]:
+        """Read plain text content and build its metadata (blocking)."""
+        content = file_path.read_text(encoding='utf-8')
         
         metadata = DocumentMetadata()
         metadata.total_words = len(content.split())
         
         # Try to extract basic metadata
-        lines = content.split('\n')
-        if lines:
-            metadata.title = lines[0].strip()
-        
-        metadata.abstract = self._extract_abstract(content)
+        metadata.title, metadata.abstract = self._extract_head_metadata(content)
         
         return content, metadata
     
     async def process_ocr(self, file_path: str) -> Optional[str]:
         """
         Perform OCR on images in PDF if text extraction fails.
+        Pages are processed in parallel in the shared process pool.
         """
+        if fitz is None:
+            logger.error("OCR processing requires PyMuPDF")
+            return None
+        
         try:
-            # This is a simplified version - in production, use more sophisticated OCR
-            # Extract images from PDF and run OCR
-            import fitz  # PyMuPDF
+            page_count = await run_in_process(_pymupdf_page_count, file_path)
             
-            pdf_document = fitz.open(file_path)
-            text_parts = []
-            
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                
-                # Get images
-                image_list = page.get_images()
-                
-                for img_index, img in enumerate(image_list):
-                    # Extract image
-                    xref = img[0]
-                    pix = fitz.Pixmap(pdf_document, xref)
-                    
-                    if pix.n - pix.alpha < 4:  # GRAY or RGB
-                        # Convert to PIL Image
-                        img_data = pix.tobytes("png")
-                        image = Image.open(io.BytesIO(img_data))
-                        
-                        # Run OCR
-                        text = pytesseract.image_to_string(image)
-                        text_parts.append(text)
-                    
-                    pix = None
+            pages = [
+                run_in_process(_ocr_page, file_path, page_num)
+                for page_num in range(page_count)
+            ]
             
-            pdf_document.close()
+            text_parts = [text for text in await asyncio.gather(*pages) if text]
             
             return '\n'.join(text_parts) if text_parts else None
             
@@ -317,30 +777,37 @@ class FileService:
         """Check if a line might be a section header."""
         line = line.strip()
         
-        # Common section headers
-        section_keywords = [
-            "abstract", "introduction", "methodology", "methods",
-            "results", "discussion", "conclusion", "references",
-            "acknowledgments", "appendix"
-        ]
+        # Most lines are rejected here: headers are short and capitalized
+        if not line or len(line) > MAX_HEADER_LENGTH:
+            return False
         
-        # Check if line is short and contains section keywords
-        if len(line.split()) <= 3:
-            lower_line = line.lower()
-            return any(keyword in lower_line for keyword in section_keywords)
+        # Check for numbered sections ("2. Methods", "3.1 Results"); bare
+        # numbers, decimals and DOIs in tables and references are not headers
+        first = line[0]
+        if first.isdigit():
+            if _NUMBERED_HEADER_RE.match(line):
+                return True
+        elif first.islower():
+            return False
         
-        # Check for numbered sections
-        if line.split('.')[0].isdigit():
-            return True
+        # Check if line is short and contains section keywords
+        if len(line.split()) > 3:
+            return False
         
-        return False
+        return line.startswith(_SECTION_STARTS) or _SECTION_KEYWORDS_RE.search(line) is not None
+    
+    def _extract_head_metadata(self, content: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Extract title and abstract from document content.
+        Both live near the start, so only the opening of the document is
+        searched for them.
+        """
+        return self._extract_title(content), self._extract_abstract(content)
     
     def _extract_title(self, content: str) -> Optional[str]:
         """Extract title from document content."""
-        lines = content.split('\n')
-        
-        # Usually title is in the first few lines
-        for i, line in enumerate(lines[:10]):
+        # Usually title is in the first few lines; only those are split off
+        for line in content.split('\n', 10)[:10]:
             line = line.strip()
             # Title is usually long enough but not too long
             if 10 <= len(line) <= 200 and not line.lower().startswith(('abstract', 'keywords')):
@@ -350,26 +817,19 @@ class FileService:
     
     def _extract_abstract(self, content: str) -> Optional[str]:
         """Extract abstract from document content."""
-        lower_content = content.lower()
-        
-        # Find abstract section
-        abstract_start = lower_content.find('abstract')
-        if abstract_start == -1:
+        # Find abstract section; case-insensitive scans avoid lowering
+        # a copy of the whole document
+        start_match = _ABSTRACT_RE.search(content, 0, ABSTRACT_SEARCH_CHARS)
+        if start_match is None:
             return None
         
-        # Find where abstract ends (usually at introduction or keywords)
-        abstract_end = len(content)
-        for end_marker in ['introduction', 'keywords', '1.', '\n\n\n']:
-            pos = lower_content.find(end_marker, abstract_start + 8)
-            if pos != -1 and pos < abstract_end:
-                abstract_end = pos
-        
-        # Extract abstract
-        abstract = content[abstract_start:abstract_end].strip()
+        # Find where abstract ends (usually at introduction or keywords);
+        # a single scan finds the earliest of all end markers
+        end_match = _ABSTRACT_END_RE.search(content, start_match.end())
+        abstract_end = end_match.start() if end_match else len(content)
         
-        # Clean up
-        if abstract.lower().startswith('abstract'):
-            abstract = abstract[8:].strip()
+        # Extract abstract, without its heading
+        abstract = content[start_match.end():abstract_end].strip()
         
         # Limit length
         words = abstract.split()
@@ -379,5 +839,7 @@ class FileService:
         return abstract if len(abstract) > 50 else None
 
 
-# Singleton instance
-file_service = FileService()
\ No newline at end of file
+@functools.cache
+def get_file_service() -> FileService:
+    """Get the shared file service, creating it on first use."""
+    return FileService()
\ No newline at end of file
@@ -4,22 +4,60 @@ User service for authentication and user management.
 Handles user registration, login, and JWT tokens.
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional, Dict, Any
 import logging
+import asyncio
+import time
+import functools
+import hashlib
+from cachetools import TTLCache
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+import jwt
+from jwt.exceptions import PyJWTError
 import secrets
-import string
 
 from ..config.settings import settings
 from ..models.user import UserCreate, UserInDB, UserUpdate, Token, TokenData
 from ..database.operations import UserOperations, SessionOperations
+from ..database.cache import session_cache, publish_invalidation
+from .executor import run_cpu
 
 logger = logging.getLogger(__name__)
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds
+)
+
+
+# In-process caches for hot authentication lookups. Evictions reach other
+# processes over Redis when caching is enabled; without it, other
+# processes serve an evicted entry until its TTL runs out.
+_session_cache: TTLCache = TTLCache(maxsize=50_000, ttl=60)
+_missing_session_cache: TTLCache = TTLCache(maxsize=50_000, ttl=5)
+_user_cache: TTLCache = TTLCache(maxsize=50_000, ttl=30)
+
+
+def _token_key(token: str) -> str:
+    """Cache key for a token; the raw token is never stored."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def evict_cached(kind: str, key: str) -> None:
+    """Evict a user or session from this process's caches."""
+    if kind == "user":
+        _user_cache.pop(key, None)
+    elif kind == "session":
+        _session_cache.pop(key, None)
+
+
+async def _invalidate(kind: str, key: str) -> None:
+    """Evict a cached user or session in this and every other process."""
+    evict_cached(kind, key)
+    await publish_invalidation(kind, key)
 
 
 class UserService:
@@ -30,25 +68,30 @@ class UserService:
         self.algorithm = settings.algorithm
         self.access_token_expire_minutes = settings.access_token_expire_minutes
         self.refresh_token_expire_days = settings.refresh_token_expire_days
+        
+        # Claims every token of each kind must carry
+        self._session_decode_options = {"require": ["exp", "type", "user_id"]}
+        self._reset_decode_options = {"require": ["exp", "type", "email"]}
     
     # Password handling
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash (off the event loop)."""
+        return await run_cpu(pwd_context.verify, plain_password, hashed_password)
     
-    def get_password_hash(self, password: str) -> str:
-        """Hash a password."""
-        return pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        """Hash a password (off the event loop)."""
+        return await run_cpu(pwd_context.hash, password)
     
     # Token handling
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token."""
         to_encode = data.copy()
         
+        # Integer epoch seconds, as JWT expects
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = int(time.time() + expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
+            expire = int(time.time()) + self.access_token_expire_minutes * 60
         
         to_encode.update({"exp": expire, "type": "access"})
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
@@ -60,9 +103,9 @@ class UserService:
         to_encode = data.copy()
         
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = int(time.time() + expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(days=self.refresh_token_expire_days)
+            expire = int(time.time()) + self.refresh_token_expire_days * 86400
         
         to_encode.update({"exp": expire, "type": "refresh"})
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
@@ -95,48 +138,97 @@ class UserService:
             expires_in=self.access_token_expire_minutes * 60  # in seconds
         )
     
-    async def verify_token(self, token: str, token_type: str = "access") -> Optional[TokenData]:
-        """Verify and decode a JWT token."""
+    def _decode_token(self, token: str, token_type: str) -> Optional[Dict[str, Any]]:
+        """Decode a JWT token and check its type; returns the payload."""
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            
-            # Check token type
-            if payload.get("type") != token_type:
-                return None
-            
-            # Check if it's a refresh token and if it's still valid in DB
-            if token_type == "refresh":
-                session = await SessionOperations.get_session(token)
-                if not session:
-                    return None
-            
-            return TokenData(
-                user_id=payload.get("user_id"),
-                username=payload.get("username"),
-                email=payload.get("email"),
-                role=payload.get("role"),
-                exp=datetime.fromtimestamp(payload.get("exp"))
+            payload = jwt.decode(
+                token,
+                self.secret_key,
+                algorithms=[self.algorithm],
+                options=self._session_decode_options
             )
-            
-        except JWTError as e:
+        except PyJWTError as e:
             logger.error(f"Token verification failed: {e}")
             return None
+        
+        # Check token type
+        if payload["type"] != token_type:
+            return None
+        
+        return payload
+    
+    async def verify_token(self, token: str, token_type: str = "access") -> Optional[TokenData]:
+        """Verify and decode a JWT token."""
+        payload = self._decode_token(token, token_type)
+        if not payload:
+            return None
+        
+        return TokenData(
+            user_id=payload.get("user_id"),
+            username=payload.get("username"),
+            email=payload.get("email"),
+            role=payload.get("role"),
+            exp=payload["exp"]
+        )
+    
+    async def _get_session_user(self, token: str, payload: Dict[str, Any]) -> Optional[UserInDB]:
+        """
+        Get the user of an active session.
+        Known sessions are answered from the in-process cache or Redis and
+        their user from the user cache; otherwise session and user are
+        fetched in one joined query, which fills the caches.
+        """
+        key = _token_key(token)
+        
+        if key in _missing_session_cache:
+            return None
+        
+        user_id = _session_cache.get(key)
+        if user_id is None:
+            session = await session_cache.get(key)
+            if session:
+                user_id = session["user_id"]
+                _session_cache[key] = user_id
+        
+        if user_id is not None:
+            return await self._get_user(user_id)
+        
+        user = await SessionOperations.get_session_user(token)
+        
+        if not user:
+            # Short negative entry blunts repeated lookups of unknown tokens
+            _missing_session_cache[key] = True
+            return None
+        
+        _session_cache[key] = user.id
+        _user_cache[user.id] = user
+        # The session expires together with its refresh token
+        await session_cache.set(key, user.id, payload["exp"])
+        return user
+    
+    async def _get_user(self, user_id: str) -> Optional[UserInDB]:
+        """Get a user by ID through the user cache."""
+        user = _user_cache.get(user_id)
+        if user is None:
+            user = await UserOperations.get_user(user_id)
+            if user:
+                _user_cache[user_id] = user
+        return user
     
     # User management
     async def register_user(self, user_data: UserCreate) -> UserInDB:
         """Register a new user."""
-        # Check if user already exists
-        existing_user = await UserOperations.get_user_by_email(user_data.email)
-        if existing_user:
-            raise ValueError("Email already registered")
+        # Check if user already exists while the password is hashed
+        conflict, hashed_password = await asyncio.gather(
+            UserOperations.find_conflicting_user(user_data.email, user_data.username),
+            self.get_password_hash(user_data.password)
+        )
         
-        existing_user = await UserOperations.get_user_by_username(user_data.username)
-        if existing_user:
+        if conflict == "email":
+            raise ValueError("Email already registered")
+        if conflict == "username":
             raise ValueError("Username already taken")
         
-        # Hash password
-        hashed_password = self.get_password_hash(user_data.password)
-        
         # Create user
         user = await UserOperations.create_user(user_data, hashed_password)
         
@@ -145,17 +237,12 @@ class UserService:
     
     async def authenticate_user(self, username_or_email: str, password: str) -> Optional[UserInDB]:
         """Authenticate a user by username/email and password."""
-        # Try to find user by email first
-        user = await UserOperations.get_user_by_email(username_or_email)
-        
-        # If not found, try username
-        if not user:
-            user = await UserOperations.get_user_by_username(username_or_email)
+        user = await UserOperations.get_user_by_email_or_username(username_or_email)
         
         if not user:
             return None
         
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         
         # Update last login
@@ -169,7 +256,7 @@ class UserService:
         if not token_data:
             return None
         
-        user = await UserOperations.get_user(token_data.user_id)
+        user = await self._get_user(token_data.user_id)
         
         if not user or not user.is_active:
             return None
@@ -178,12 +265,12 @@ class UserService:
     
     async def refresh_access_token(self, refresh_token: str) -> Optional[Token]:
         """Refresh access token using refresh token."""
-        token_data = await self.verify_token(refresh_token, token_type="refresh")
-        if not token_data:
+        payload = self._decode_token(refresh_token, "refresh")
+        if not payload:
             return None
         
-        user = await UserOperations.get_user(token_data.user_id)
-        if not user or not user.is_active:
+        user = await self._get_session_user(refresh_token, payload)
+        if not user or not user.is_active or user.id != payload["user_id"]:
             return None
         
         # Create new tokens
@@ -191,15 +278,24 @@ class UserService:
     
     async def logout_user(self, token: str) -> bool:
         """Logout user by invalidating their session."""
-        return await SessionOperations.invalidate_session(token)
+        # Delete first, so no cache can be refilled from the stored session
+        invalidated = await SessionOperations.invalidate_session(token)
+        
+        key = _token_key(token)
+        await session_cache.delete(key)
+        await _invalidate("session", key)
+        
+        return invalidated
     
     async def update_user(self, user_id: str, user_update: UserUpdate) -> Optional[UserInDB]:
         """Update user information."""
         # If password is being updated, hash it
         if user_update.password:
-            user_update.password = self.get_password_hash(user_update.password)
+            user_update.password = await self.get_password_hash(user_update.password)
         
-        return await UserOperations.update_user(user_id, user_update)
+        updated_user = await UserOperations.update_user(user_id, user_update)
+        await _invalidate("user", user_id)
+        return updated_user
     
     async def change_password(self, user_id: str, old_password: str, new_password: str) -> bool:
         """Change user password."""
@@ -208,22 +304,29 @@ class UserService:
             return False
         
         # Verify old password
-        if not self.verify_password(old_password, user.hashed_password):
+        if not await self.verify_password(old_password, user.hashed_password):
             return False
         
         # Update password
-        hashed_password = self.get_password_hash(new_password)
+        hashed_password = await self.get_password_hash(new_password)
         update_data = UserUpdate(password=hashed_password)
         
         updated_user = await UserOperations.update_user(user_id, update_data)
+        await _invalidate("user", user_id)
         return updated_user is not None
     
+    async def delete_user(self, user_id: str) -> bool:
+        """Deactivate a user and evict them from the user caches."""
+        deleted = await UserOperations.delete_user(user_id)
+        await _invalidate("user", user_id)
+        return deleted
+    
     def generate_password_reset_token(self, email: str) -> str:
         """Generate a password reset token."""
         data = {
             "email": email,
             "type": "password_reset",
-            "exp": datetime.utcnow() + timedelta(hours=24)
+            "exp": int(time.time()) + 24 * 3600
         }
         
         return jwt.encode(data, self.secret_key, algorithm=self.algorithm)
@@ -231,14 +334,19 @@ class UserService:
     async def verify_password_reset_token(self, token: str) -> Optional[str]:
         """Verify password reset token and return email."""
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = jwt.decode(
+                token,
+                self.secret_key,
+                algorithms=[self.algorithm],
+                options=self._reset_decode_options
+            )
             
-            if payload.get("type") != "password_reset":
+            if payload["type"] != "password_reset":
                 return None
             
-            return payload.get("email")
+            return payload["email"]
             
-        except JWTError:
+        except PyJWTError:
             return None
     
     async def reset_password(self, token: str, new_password: str) -> bool:
@@ -252,23 +360,37 @@ class UserService:
             return False
         
         # Update password
-        hashed_password = self.get_password_hash(new_password)
+        hashed_password = await self.get_password_hash(new_password)
         update_data = UserUpdate(password=hashed_password)
         
         updated_user = await UserOperations.update_user(user.id, update_data)
+        await _invalidate("user", user.id)
         return updated_user is not None
     
     def generate_api_key(self) -> str:
-        """Generate a secure API key."""
-        alphabet = string.ascii_letters + string.digits
-        return ''.join(secrets.choice(alphabet) for _ in range(32))
+        """Generate a secure API key (32 URL-safe characters)."""
+        return secrets.token_urlsafe(24)
+    
+    async def create_api_key(self, user_id: str) -> str:
+        """
+        Issue a new API key for a user, replacing any previous one.
+        Only its hash is stored, so the key is returned exactly once.
+        """
+        api_key = self.generate_api_key()
+        
+        await UserOperations.set_api_key_hash(user_id, _token_key(api_key))
+        await _invalidate("user", user_id)
+        
+        return api_key
     
     async def verify_api_key(self, api_key: str) -> Optional[UserInDB]:
         """Verify API key and return associated user."""
-        # In a real implementation, store API keys in database
-        # This is a simplified version
-        # You would query the database for the API key and return the associated user
-        pass
+        user = await UserOperations.get_user_by_api_key_hash(_token_key(api_key))
+        
+        if not user or not user.is_active:
+            return None
+        
+        return user
     
     async def get_user_stats(self, user_id: str) -> Dict[str, Any]:
         """Get user statistics."""
@@ -290,5 +412,7 @@ class UserService:
         }
 
 
-# Singleton instance
-user_service = UserService()
\ No newline at end of file
+@functools.cache
+def get_user_service() -> UserService:
+    """Get the shared user service, creating it on first use."""
+    return UserService()
\ No newline at end of file
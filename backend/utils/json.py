@@ -0,0 +1,26 @@
+# backend/utils/json.py
+"""
+Shared JSON serialization.
+Used for API responses and exports alike.
+"""
+
+from typing import Any
+
+from bson import ObjectId
+import orjson
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any, option: int = 0) -> bytes:
+    """
+    Serialize to JSON with orjson.
+    ObjectIds become strings and naive datetimes (as stored by MongoDB)
+    are marked as UTC.
+    """
+    return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NAIVE_UTC | option)
@@ -0,0 +1,71 @@
+# backend/workers.py
+"""
+Background worker entry point.
+Processes uploaded documents out of the API process using Arq over Redis.
+
+Run with: arq backend.workers.WorkerSettings
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from arq import cron
+from arq.connections import RedisSettings
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+from .config.settings import settings
+from .database.connection import db_manager
+from .database.cache import close_redis
+from .routers.upload import process_document_background
+from .services.file_service import get_file_service
+
+logger = logging.getLogger(__name__)
+
+# Uvicorn picks uvloop up on its own; the worker's loop needs the policy set
+if uvloop is not None:
+    uvloop.install()
+
+
+async def process_document(
+    ctx: Dict[str, Any],
+    document_id: str,
+    file_path: str,
+    doc_type: str,
+    content_hash: Optional[str] = None,
+    user_id: Optional[str] = None
+) -> None:
+    """Extract content, embeddings, and metadata for an uploaded document."""
+    await process_document_background(document_id, file_path, doc_type, content_hash, user_id)
+
+
+async def collect_orphaned_blobs(ctx: Dict[str, Any]) -> None:
+    """Remove stored files that no document refers to."""
+    removed = await get_file_service().remove_orphaned_blobs(settings.blob_gc_grace_seconds)
+    logger.info(f"Removed {removed} orphaned files")
+
+
+async def startup(ctx: Dict[str, Any]) -> None:
+    """Connect the worker to the database."""
+    await db_manager.connect()
+    logger.info("Worker started")
+
+
+async def shutdown(ctx: Dict[str, Any]) -> None:
+    """Close the worker's cache and database connections."""
+    await close_redis()
+    await db_manager.disconnect()
+    logger.info("Worker stopped")
+
+
+class WorkerSettings:
+    """Arq worker configuration."""
+    functions = [process_document]
+    cron_jobs = [cron(collect_orphaned_blobs, minute=0)]
+    on_startup = startup
+    on_shutdown = shutdown
+    redis_settings = RedisSettings.from_dsn(settings.redis_url)
+    max_jobs = settings.worker_max_jobs
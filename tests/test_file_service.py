@@ -0,0 +1,66 @@
+"""
+Tests for the file service helpers.
+"""
+
+import io
+import tempfile
+
+import pytest
+
+# The file service imports the document processing stack at module level
+for module in ("fastapi", "pydantic_settings", "orjson", "lxml", "pdfplumber", "pypdfium2", "PIL", "pytesseract"):
+    pytest.importorskip(module)
+
+from backend.services.file_service import FileService, _is_on_disk
+
+
+@pytest.fixture
+def file_service():
+    # Header detection needs no upload folder, so skip __init__
+    return FileService.__new__(FileService)
+
+
+@pytest.mark.parametrize("line", [
+    "2. Methods",
+    "3.1 Results",
+    "4.2.1. Data Collection",
+    "Introduction",
+    "REFERENCES",
+])
+def test_section_headers_are_detected(file_service, line):
+    assert file_service._is_section_header(line)
+
+
+@pytest.mark.parametrize("line", [
+    "0.91",
+    "0.87",
+    "3.14",
+    "2.0",
+    "1.5 million",
+    "10.1109/5.771073",
+    "3",
+    "2019",
+    "",
+])
+def test_numbers_are_not_section_headers(file_service, line):
+    assert not file_service._is_section_header(line)
+
+
+def test_small_spooled_upload_is_in_memory():
+    with tempfile.SpooledTemporaryFile(max_size=1024) as f:
+        f.write(b"x" * 10)
+        assert not _is_on_disk(f)
+        # The check itself must not force the upload to disk
+        assert not _is_on_disk(f)
+
+
+def test_rolled_spooled_upload_is_on_disk():
+    with tempfile.SpooledTemporaryFile(max_size=1024) as f:
+        f.write(b"x" * 2048)
+        assert _is_on_disk(f)
+
+
+def test_plain_file_objects():
+    assert not _is_on_disk(io.BytesIO(b"data"))
+    with tempfile.TemporaryFile() as f:
+        assert _is_on_disk(f)